@@ -0,0 +1,73 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from server.settings import TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL, PERMISSION_CACHE_SIZE, PERMISSION_CACHE_TTL
+
+
+class TTLCache:
+    """LRU кэш бо мӯҳлати зиндагии ҳар як сабт."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at: float = None):
+        if self.maxsize <= 0:
+            return
+        ttl_expires_at = time.time() + self.ttl
+        expires_at = ttl_expires_at if expires_at is None else min(expires_at, ttl_expires_at)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class TokenCache(TTLCache):
+    """Токенҳо аз рӯи hash нигоҳ дошта мешаванд ва то exp-и худи токен зиндагӣ мекунанд."""
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str):
+        return super().get(self._key(token))
+
+    def set(self, token: str, credentials: dict):
+        super().set(self._key(token), credentials, expires_at=credentials["exp"])
+
+    def invalidate(self, token: str):
+        super().invalidate(self._key(token))
+
+
+token_cache = TokenCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+
+# user_id -> (roles, permissions), ҳар ду frozenset
+permission_cache = TTLCache(maxsize=PERMISSION_CACHE_SIZE, ttl=PERMISSION_CACHE_TTL)
+
+# Версияи графи roles/permissions; токенҳои версияи кӯҳна бояд refresh шаванд
+graph_version_cache = TTLCache(maxsize=1, ttl=PERMISSION_CACHE_TTL)
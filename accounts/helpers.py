@@ -1,8 +1,12 @@
-from .models import User, Role
+from .models import User, Role, Permission, PermissionGraphVersion, user_permissions, role_permissions, user_roles
 from .security import *
-from sqlalchemy.orm import selectinload, Session
+from .cache import permission_cache, graph_version_cache
+from server.settings import TOKEN_EMBED_PERMISSIONS
+from sqlalchemy import select, update, literal, union_all
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 
-def get_user(username:str=None, user_id:int=None, db:Session=None):
+async def get_user(username:str=None, user_id:int=None, db:AsyncSession=None):
     
     
     
@@ -10,65 +14,124 @@ def get_user(username:str=None, user_id:int=None, db:Session=None):
         return None
     
     
-    q = db.query(User).options(
+    q = select(User).options(
         selectinload(User.permissions),
         selectinload(User.roles).selectinload(Role.permissions))
     
     if username:
         
-        user = q.filter(User.username==username).first()
+        user = await db.scalar(q.filter(User.username==username))
         return user
     elif user_id:
-        user = q.filter(User.id==user_id).first()
+        user = await db.scalar(q.filter(User.id==user_id))
         return user
-    print(user)
     return None
 
 
-def authenticate(username:str, password:str=None, db:Session=None):
+async def get_effective_permissions(user_id:int, db:AsyncSession, use_cache:bool=True):
+    # Ҳамаи roles ва permissions-и корбар бо як query (бе lazy load), баъд аз кэш
+    cached = permission_cache.get(user_id) if use_cache else None
+    if cached is not None:
+        return cached
+
+    direct_permissions = select(literal("permission").label("kind"), Permission.name) \
+        .join(user_permissions, user_permissions.c.permission_id == Permission.id) \
+        .filter(user_permissions.c.user_id == user_id)
+    role_based_permissions = select(literal("permission").label("kind"), Permission.name) \
+        .join(role_permissions, role_permissions.c.permission_id == Permission.id) \
+        .join(user_roles, user_roles.c.role_id == role_permissions.c.role_id) \
+        .filter(user_roles.c.user_id == user_id)
+    roles = select(literal("role").label("kind"), Role.name) \
+        .join(user_roles, user_roles.c.role_id == Role.id) \
+        .filter(user_roles.c.user_id == user_id)
+
+    rows = (await db.execute(union_all(direct_permissions, role_based_permissions, roles))).all()
+    result = (
+        frozenset(name for kind, name in rows if kind == "role"),
+        frozenset(name for kind, name in rows if kind == "permission"),
+    )
+    permission_cache.set(user_id, result)
+    return result
+
+
+async def get_permission_graph_version(db:AsyncSession, use_cache:bool=True):
+    version = graph_version_cache.get("version") if use_cache else None
+    if version is None:
+        version = await db.scalar(select(PermissionGraphVersion.version)) or 0
+        graph_version_cache.set("version", version)
+    return version
+
+
+async def bump_permission_graph_version(db:AsyncSession):
+    # Баъди тағйири roles/permissions ҳамаи токенҳои дорои claims кӯҳна мешаванд
+    result = await db.execute(update(PermissionGraphVersion).values(version=PermissionGraphVersion.version + 1))
+    if result.rowcount == 0:
+        db.add(PermissionGraphVersion(version=1))
+    await db.commit()
+    graph_version_cache.clear()
+
+
+async def issue_access_token(username:str, user_id:int, db:AsyncSession):
+    claims = None
+    if TOKEN_EMBED_PERMISSIONS:
+        # Аввал версия, баъд иҷозатҳо, ҳарду аз база: токен ҳеҷ гоҳ pv-и навро бо
+        # иҷозатҳое, ки пеш аз bump дар кэши ин worker монда буданд, намегирад
+        version = await get_permission_graph_version(db, use_cache=False)
+        roles, permissions = await get_effective_permissions(user_id, db, use_cache=False)
+        claims = {
+            "roles":sorted(roles),
+            "perms":sorted(permissions),
+            "pv":version,
+        }
+    return create_access_token(username, user_id, claims=claims)
+
+
+async def authenticate(username:str, password:str=None, db:AsyncSession=None):
     
-    user = get_user(username=username, db=db)
+    user = await get_user(username=username, db=db)
     if user and password:
-        is_password_correct = verify_password(password, user.password)
+        is_password_correct = await async_verify_password(password, user.password)
         if is_password_correct:
+            if password_needs_rehash(user.password):
+                user.password = await async_hash_password(password)
+                await db.commit()
             return user
     return None
 
 
-def _create_user_object(data):
+async def _create_user_object(data):
     
-    data["password"] = hash_password(data["password"])
+    data["password"] = await async_hash_password(data["password"])
     data.pop("confirm_password", None)  
     new_user = User(**data)
     return new_user
 
 
-def _create_user(data, db):
+async def _create_user(data, db):
    
     try:
-        user = _create_user_object(data)
+        user = await _create_user_object(data)
         db.add(user)
-        db.commit()
-        db.refresh(user)
-        return user
+        await db.commit()
+        return await get_user(user_id=user.id, db=db)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise e
 
 
-def create_user(data, db):
+async def create_user(data, db):
     
     data = data.model_dump()
-    user = _create_user(data, db)
+    user = await _create_user(data, db)
     return user
 
 
-def create_superuser(data, db):
+async def create_superuser(data, db):
    
     data = data.model_dump()
     data.update({
         "is_staff": True,
         "is_superuser": True
     })
-    user = _create_user(data, db)
-    return user
\ No newline at end of file
+    user = await _create_user(data, db)
+    return user
@@ -1,6 +1,6 @@
-from sqlalchemy import Integer, String, DateTime, Table, Column, ForeignKey, false, Time, Date, Float, Text , Boolean
+from sqlalchemy import Integer, String, DateTime, Table, Column, ForeignKey, false, Time, Date, Float, Text , Boolean, Index, text, select, func, inspect
 from datetime import datetime, date, time
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship, column_property
 from server.models import BaseModel
 
 
@@ -25,6 +25,19 @@ user_roles = Table(
     Column("role_id", Integer, ForeignKey("roles.id"), primary_key=True)
 )
 
+def loaded_relation(obj, name):
+    # Танҳо агар relationship аллакай бор шуда бошад (lazy load дар AsyncSession имкон надорад)
+    if name in inspect(obj).unloaded:
+        return None
+    return getattr(obj, name)
+
+
+def full_name(person):
+    if person is None:
+        return None
+    return " ".join(part for part in (person.last_name, person.first_name, person.middle_name) if part)
+
+
 class User(BaseModel):
     __tablename__ = "users"
     
@@ -61,22 +74,57 @@ class Role(BaseModel):
     permissions: Mapped[list["Permission"]] = relationship("Permission", secondary=role_permissions, back_populates="roles")
 
 
-class BlackListTokens(BaseModel):
-    __tablename__ = "blacklisted_tokens"
+class PermissionGraphVersion(BaseModel):
+    __tablename__ = "permission_graph_version"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+
+
+class RevokedToken(BaseModel):
+    __tablename__ = "revoked_tokens"
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    token: Mapped[str] = mapped_column(String, nullable=False)
+    jti: Mapped[str] = mapped_column(String(32), nullable=False, unique=True)
+    exp: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
 
 
+class ChangeLog(BaseModel):
+    # Журнали тағйирот барои GET /sync; id худи cursor аст (server/sync.py).
+    # AUTOINCREMENT: баъди compact id-и охирин дубора дода намешавад, вагарна cursor онро гум мекунад
+    __tablename__ = "change_log"
+    __table_args__ = (
+        Index("ix_change_log_table_row", "table_name", "row_id"),
+        {"sqlite_autoincrement": True},
+    )
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    table_name: Mapped[str] = mapped_column(String(50), nullable=False)
+    row_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    operation: Mapped[str] = mapped_column(String(10), nullable=False)  # upsert | delete
+    changed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, index=True)
+
+
+class SyncState(BaseModel):
+    # Як сатр: то кадом id tombstone-ҳо тоза шудаанд; cursor-и хурдтар бояд аз нав sync кунад
+    __tablename__ = "sync_state"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    purged_through: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
 
 
 class Hospital(BaseModel):
     __tablename__ = "hospitals"
     
     id: Mapped[int] = mapped_column(primary_key=True)
+    # Optimistic locking: ҳар UPDATE версияро тафтиш ва зиёд мекунад (PATCH + If-Match)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
     name: Mapped[str] = mapped_column(String(200))
-    region: Mapped[str] = mapped_column(String(50))  
+    region: Mapped[str] = mapped_column(String(50), index=True)  
     city: Mapped[str] = mapped_column(String(50))
     address: Mapped[str] = mapped_column(String(300))
     phone: Mapped[str] = mapped_column(String(20))
@@ -87,19 +135,43 @@ class Hospital(BaseModel):
     is_active: Mapped[bool] = mapped_column(default=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
     
+    __table_args__ = (
+        # Bounding box-и GET /hospitals/nearby
+        Index("ix_hospitals_lat_lon", "latitude", "longitude"),
+        # Keyset pagination: барои ҳар sort_field-и иҷозатдода (field, id), то саҳифа бе sort-и тамоми ҷадвал бошад
+        Index("ix_hospitals_created_at_id", "created_at", "id"),
+        Index("ix_hospitals_name_id", "name", "id"),
+    )
     
     doctors: Mapped[list["Doctor"]] = relationship(back_populates="hospital", cascade="all, delete-orphan")
     departments: Mapped[list["Department"]] = relationship(back_populates="hospital", cascade="all, delete-orphan")
     appointments: Mapped[list["Appointment"]] = relationship(back_populates="hospital", cascade="all, delete-orphan")
 
 
+class HospitalStats(BaseModel):
+    __tablename__ = "hospital_stats"
+    
+    hospital_id: Mapped[int] = mapped_column(ForeignKey("hospitals.id", ondelete="CASCADE"), primary_key=True)
+    doctor_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    appointment_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+
+class HospitalAppointmentStats(BaseModel):
+    __tablename__ = "hospital_appointment_stats"
+    
+    hospital_id: Mapped[int] = mapped_column(ForeignKey("hospitals.id", ondelete="CASCADE"), primary_key=True)
+    appointment_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    status: Mapped[str] = mapped_column(String(20), primary_key=True)
+    appointment_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+
 class Department(BaseModel):
     __tablename__ = "departments"
     
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(100))
     description: Mapped[str] = mapped_column(Text, nullable=True)
-    hospital_id: Mapped[int] = mapped_column(ForeignKey("hospitals.id"))
+    hospital_id: Mapped[int] = mapped_column(ForeignKey("hospitals.id"), index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
     
     
@@ -109,8 +181,14 @@ class Department(BaseModel):
 
 class Patient(BaseModel):
     __tablename__ = "patients"
+    __table_args__ = (
+        Index("ix_patients_created_at_id", "created_at", "id"),
+        Index("ix_patients_last_name_id", "last_name", "id"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=True)
     first_name: Mapped[str] = mapped_column(String(50))
     last_name: Mapped[str] = mapped_column(String(50))
@@ -120,7 +198,7 @@ class Patient(BaseModel):
     passport_number: Mapped[str] = mapped_column(String(20), unique=True)
     phone: Mapped[str] = mapped_column(String(20))
     address: Mapped[str] = mapped_column(String(300))
-    region: Mapped[str] = mapped_column(String(50))
+    region: Mapped[str] = mapped_column(String(50), index=True)
     blood_type: Mapped[str] = mapped_column(String(3), nullable=True)
     allergies: Mapped[str] = mapped_column(Text, nullable=True)
     chronic_diseases: Mapped[str] = mapped_column(Text, nullable=True)
@@ -137,9 +215,15 @@ class Patient(BaseModel):
 
 class Doctor(BaseModel):
     __tablename__ = "doctors"
+    __table_args__ = (
+        Index("ix_doctors_last_name_id", "last_name", "id"),
+        Index("ix_doctors_experience_years_id", "experience_years", "id"),
+    )
     
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
     
     
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=True)
@@ -148,15 +232,15 @@ class Doctor(BaseModel):
     last_name: Mapped[str] = mapped_column(String(50))
     middle_name: Mapped[str] = mapped_column(String(50), nullable=True)
     birth_date: Mapped[date] = mapped_column(Date)
-    specialization: Mapped[str] = mapped_column(String(100))
+    specialization: Mapped[str] = mapped_column(String(100), index=True)
     license_number: Mapped[str] = mapped_column(String(50), unique=True)
     qualification: Mapped[str] = mapped_column(String(100))  
     experience_years: Mapped[int] = mapped_column(Integer)
     phone: Mapped[str] = mapped_column(String(20))
     email: Mapped[str] = mapped_column(String(100))
     
-    hospital_id: Mapped[int] = mapped_column(ForeignKey("hospitals.id"), nullable=True)
-    department_id: Mapped[int] = mapped_column(ForeignKey("departments.id"), nullable=True)
+    hospital_id: Mapped[int] = mapped_column(ForeignKey("hospitals.id"), nullable=True, index=True)
+    department_id: Mapped[int] = mapped_column(ForeignKey("departments.id"), nullable=True, index=True)
     
     is_available: Mapped[bool] = mapped_column(Boolean, default=True)
     consultation_fee: Mapped[float] = mapped_column(Float, nullable=True)
@@ -176,13 +260,23 @@ class Doctor(BaseModel):
             (today.month, today.day) < (self.birth_date.month, self.birth_date.day)
         )
 
+    @property
+    def hospital_name(self):
+        hospital = loaded_relation(self, "hospital")
+        return hospital.name if hospital else None
+
+    @property
+    def department_name(self):
+        department = loaded_relation(self, "department")
+        return department.name if department else None
+
 
 
 class DoctorSchedule(BaseModel):
     __tablename__ = "doctor_schedules"
     
     id: Mapped[int] = mapped_column(primary_key=True)
-    doctor_id: Mapped[int] = mapped_column(ForeignKey("doctors.id"))
+    doctor_id: Mapped[int] = mapped_column(ForeignKey("doctors.id"), index=True)
     day_of_week: Mapped[int] = mapped_column(Integer) 
     start_time: Mapped[time] = mapped_column(Time)
     end_time: Mapped[time] = mapped_column(Time)
@@ -194,8 +288,28 @@ class DoctorSchedule(BaseModel):
 
 class Appointment(BaseModel):
     __tablename__ = "appointments"
+    __table_args__ = (
+        # Як духтур дар як вақт танҳо як қабули фаъол дошта метавонад (бекоршудаҳо слотро озод мекунанд)
+        Index(
+            "uq_appointments_doctor_slot", "doctor_id", "appointment_date", "appointment_time",
+            unique=True,
+            sqlite_where=text("status != 'cancelled'"),
+            postgresql_where=text("status != 'cancelled'"),
+        ),
+        # Ҷадвали рӯзонаи духтур/беморхона ва слотҳои озод
+        Index("ix_appointments_doctor_date_time", "doctor_id", "appointment_date", "appointment_time"),
+        Index("ix_appointments_hospital_date_time", "hospital_id", "appointment_date", "appointment_time"),
+        # Таърихи бемор аз нав ба кӯҳна
+        Index("ix_appointments_patient_created", "patient_id", "created_at"),
+        Index("ix_appointments_patient_date_time", "patient_id", "appointment_date", "appointment_time"),
+        Index("ix_appointments_status_date", "status", "appointment_date"),
+        Index("ix_appointments_created_at_id", "created_at", "id"),
+        Index("ix_appointments_appointment_date_id", "appointment_date", "id"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
     patient_id: Mapped[int] = mapped_column(ForeignKey("patients.id"))
     doctor_id: Mapped[int] = mapped_column(ForeignKey("doctors.id"))
     hospital_id: Mapped[int] = mapped_column(ForeignKey("hospitals.id"))
@@ -213,14 +327,33 @@ class Appointment(BaseModel):
     hospital: Mapped["Hospital"] = relationship(back_populates="appointments")
     medical_record: Mapped["MedicalRecord"] = relationship(back_populates="appointment", uselist=False)
 
+    @property
+    def patient_name(self):
+        return full_name(loaded_relation(self, "patient"))
+
+    @property
+    def doctor_name(self):
+        return full_name(loaded_relation(self, "doctor"))
+
+    @property
+    def hospital_name(self):
+        hospital = loaded_relation(self, "hospital")
+        return hospital.name if hospital else None
+
 
 class MedicalRecord(BaseModel):
     __tablename__ = "medical_records"
+    __table_args__ = (
+        Index("ix_medical_records_patient_created", "patient_id", "created_at"),
+        Index("ix_medical_records_created_at_id", "created_at", "id"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
-    appointment_id: Mapped[int] = mapped_column(ForeignKey("appointments.id"))
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
+    appointment_id: Mapped[int] = mapped_column(ForeignKey("appointments.id"), index=True)
     patient_id: Mapped[int] = mapped_column(ForeignKey("patients.id"))
-    doctor_id: Mapped[int] = mapped_column(ForeignKey("doctors.id"))
+    doctor_id: Mapped[int] = mapped_column(ForeignKey("doctors.id"), index=True)
     
     diagnosis: Mapped[str] = mapped_column(Text)
     symptoms: Mapped[str] = mapped_column(Text)
@@ -238,9 +371,14 @@ class MedicalRecord(BaseModel):
 
 class Prescription(BaseModel):
     __tablename__ = "prescriptions"
+    __table_args__ = (
+        Index("ix_prescriptions_prescribed_date_id", "prescribed_date", "id"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
-    medical_record_id: Mapped[int] = mapped_column(ForeignKey("medical_records.id"))
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
+    medical_record_id: Mapped[int] = mapped_column(ForeignKey("medical_records.id"), index=True)
     medicine_name: Mapped[str] = mapped_column(String(200))
     dosage: Mapped[str] = mapped_column(String(100))  
     frequency: Mapped[str] = mapped_column(String(100))  
@@ -250,4 +388,12 @@ class Prescription(BaseModel):
     
     
     medical_record: Mapped["MedicalRecord"] = relationship(back_populates="prescriptions")
-              
\ No newline at end of file
+
+
+# Шумораи духтурон барои HospitalSchema аз ҷадвали hospital_stats (server/stats.py онро нигоҳ медорад);
+# deferred, бо undefer() дар loader profile бор мешавад
+Hospital.doctor_count = column_property(
+    func.coalesce(
+        select(HospitalStats.doctor_count).where(HospitalStats.hospital_id == Hospital.id).scalar_subquery(), 0),
+    deferred=True,
+)
@@ -1,9 +1,9 @@
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from server.settings import get_db
 from .validators import validate_access_token
-from .models import User
+from .helpers import get_user, get_effective_permissions, get_permission_graph_version
 
 
 
@@ -11,13 +11,13 @@ oauth_bearer = HTTPBearer(auto_error=False)
 
 
 
-def is_authenticated(credentials:HTTPAuthorizationCredentials=Depends(oauth_bearer), db:Session=Depends(get_db)):
+async def is_authenticated(credentials:HTTPAuthorizationCredentials=Depends(oauth_bearer), db:AsyncSession=Depends(get_db)):
     if not credentials:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Unauthorized!"
         )
-    is_valid_token = validate_access_token(token=credentials.credentials, db=db)
+    is_valid_token = await validate_access_token(token=credentials.credentials, db=db)
     if is_valid_token is not None:
         return is_valid_token
     raise HTTPException(
@@ -26,17 +26,34 @@ def is_authenticated(credentials:HTTPAuthorizationCredentials=Depends(oauth_bear
         )
 
 
-def get_current_user(credentials=Depends(is_authenticated), db:Session=Depends(get_db)):
-    user = db.query(User).filter(User.username==credentials["username"]).first()
+async def is_authenticated_stream(credentials:HTTPAuthorizationCredentials=Depends(oauth_bearer), db:AsyncSession=Depends(get_db, scope="function")):
+    # Барои StreamingResponse (SSE, export): session пеш аз оғози stream баста мешавад,
+    # вагарна ҳар stream-и кушода як пайвасти pool-ро то охир нигоҳ медорад
+    return await is_authenticated(credentials, db)
+
+
+async def get_current_user(credentials=Depends(is_authenticated), db:AsyncSession=Depends(get_db)):
+    user = await get_user(username=credentials["username"], db=db)
     return user
 
 
+async def get_authorization_claims(credentials:dict, db:AsyncSession):
+    # Агар токен roles/permissions-ро дар худ дошта бошад, ба база намеравем
+    if "perms" in credentials:
+        # Версияи кэшшуда то PERMISSION_CACHE_TTL ақиб буда метавонад; токени аз worker-и
+        # дигар бо pv-и навтар дуруст аст, танҳо pv-и кӯҳна рад мешавад
+        if credentials.get("pv", -1) < await get_permission_graph_version(db):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Permissions changed, refresh the access token!"
+            )
+        return frozenset(credentials["roles"]), frozenset(credentials["perms"])
+    return await get_effective_permissions(int(credentials["sub"]), db)
+
+
 def required_permission(req_permissions:list):
-    def has_permission(user=Depends(get_current_user)):
-        user_permissions = [per.name for per in user.permissions]
-        for role in user.roles:
-            for per in role.permissions:
-                user_permissions.append(per.name)
+    async def has_permission(credentials=Depends(is_authenticated), db:AsyncSession=Depends(get_db)):
+        _, user_permissions = await get_authorization_claims(credentials, db)
         for permission in req_permissions:
             if permission in user_permissions:
                 return True
@@ -49,8 +66,8 @@ def required_permission(req_permissions:list):
 
 
 def role_required(req_roles:list):
-    def has_permission(user=Depends(get_current_user)):
-        user_roles = [role.name for role in user.roles]
+    async def has_permission(credentials=Depends(is_authenticated), db:AsyncSession=Depends(get_db)):
+        user_roles, _ = await get_authorization_claims(credentials, db)
         
         for role in req_roles:
             if role in user_roles:
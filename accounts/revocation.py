@@ -0,0 +1,94 @@
+import asyncio
+import hashlib
+import math
+import time
+
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from server.settings import (
+    AsyncSessionLocal, REVOCATION_BLOOM_ENABLED, REVOCATION_BLOOM_CAPACITY,
+    REVOCATION_BLOOM_ERROR_RATE, REVOCATION_SWEEP_INTERVAL)
+from .models import RevokedToken
+
+
+class BloomFilter:
+    """Филтри Bloom: "не" ҳамеша дуруст аст, "шояд" бояд дар база тафтиш шавад."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str):
+        digest = hashlib.sha256(value.encode()).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, value: str):
+        for pos in self._positions(value):
+            self._bits[pos // 8] |= 1 << (pos % 8)
+
+    def __contains__(self, value: str):
+        return all(self._bits[pos // 8] & (1 << (pos % 8)) for pos in self._positions(value))
+
+
+# Филтр танҳо бекоркуниҳои ҳамин worker-ро фавран мебинад. Бекоркунӣ дар worker-и дигар
+# то sweep-и навбатӣ (REVOCATION_SWEEP_INTERVAL сония) ба ин ҷо намерасад ва дар ин муддат
+# "не"-и филтр бе тафтиши база қабул мешавад.
+revoked_filter = None
+# jti-ҳое, ки ҳангоми аз нав сохтани филтр бекор шуданд (None - rebuild намеравад)
+_revoked_during_rebuild = None
+
+
+async def rebuild_revoked_filter(db: AsyncSession):
+    global revoked_filter, _revoked_during_rebuild
+    if not REVOCATION_BLOOM_ENABLED:
+        return
+    bloom = BloomFilter(REVOCATION_BLOOM_CAPACITY, REVOCATION_BLOOM_ERROR_RATE)
+    _revoked_during_rebuild = set()
+    try:
+        jtis = await db.scalars(select(RevokedToken.jti).filter(RevokedToken.exp > int(time.time())))
+        for jti in jtis:
+            bloom.add(jti)
+        # revoke_token-е, ки ҳангоми SELECT commit шуд, ба филтри кӯҳна рафт; пеш аз иваз илова мекунем
+        for jti in _revoked_during_rebuild:
+            bloom.add(jti)
+        revoked_filter = bloom
+    finally:
+        _revoked_during_rebuild = None
+
+
+async def revoke_token(credentials: dict, db: AsyncSession):
+    db.add(RevokedToken(jti=credentials["jti"], exp=int(credentials["exp"])))
+    await db.commit()
+    if _revoked_during_rebuild is not None:
+        _revoked_during_rebuild.add(credentials["jti"])
+    if revoked_filter is not None:
+        revoked_filter.add(credentials["jti"])
+
+
+async def is_token_revoked(jti: str, db: AsyncSession) -> bool:
+    if revoked_filter is not None and jti not in revoked_filter:
+        return False
+    revoked = await db.scalar(select(RevokedToken.id).filter(RevokedToken.jti == jti))
+    return revoked is not None
+
+
+async def purge_expired_tokens(db: AsyncSession):
+    await db.execute(delete(RevokedToken).filter(RevokedToken.exp <= int(time.time())))
+    await db.commit()
+
+
+async def revocation_sweeper():
+    # Токенҳои мӯҳлаташон гузаштаро тоза мекунем ва филтрро аз нав месозем,
+    # то бекоркуниҳое, ки дар дигар worker-ҳо шудаанд, низ ба он дароянд
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                await purge_expired_tokens(db)
+                await rebuild_revoked_filter(db)
+        except Exception as error:
+            print(f"Revocation sweeper failed: {error}")
+        await asyncio.sleep(REVOCATION_SWEEP_INTERVAL)
@@ -1,7 +1,29 @@
-from pydantic import BaseModel, model_validator, field_validator, EmailStr, ValidationError, ConfigDict
+from pydantic import BaseModel, model_validator, field_validator, EmailStr, ValidationError, ConfigDict, create_model
 from .models import Permission
 from datetime import date, datetime
-from typing import Optional, List
+from typing import Optional, List, Generic, TypeVar, get_args
+
+
+def partial_schema(schema, not_null=()):
+    """Варианти PATCH: ҳамаи майдонҳо ихтиёрӣ, аммо майдонҳои ҳатмӣ null шуда наметавонанд.
+
+    not_null - майдонҳои Optional-и схема, ки сутуни базаашон NOT NULL аст.
+    """
+    not_nullable = {name for name, field in schema.model_fields.items() if type(None) not in get_args(field.annotation)}
+    not_nullable |= set(not_null)
+
+    class PartialBase(BaseModel):
+        model_config = ConfigDict(extra="forbid")
+
+        @model_validator(mode="after")
+        def required_fields_not_null(self):
+            for name in self.model_fields_set & not_nullable:
+                if getattr(self, name) is None:
+                    raise ValueError(f"{name} cannot be null")
+            return self
+
+    fields = {name: (Optional[field.annotation], None) for name, field in schema.model_fields.items()}
+    return create_model(schema.__name__.replace("Create", "Update"), __base__=PartialBase, **fields)
 
 
 class RegisterSchema(BaseModel): 
@@ -141,8 +163,12 @@ class PatientCreateSchema(BaseModel):
     emergency_phone: str
 
 
+PatientUpdateSchema = partial_schema(PatientCreateSchema)
+
+
 class PatientSchema(PatientCreateSchema):
     id: int
+    version: int = 1
     user_id: Optional[int] = None
     created_at: datetime
     
@@ -166,8 +192,12 @@ class DoctorCreateSchema(BaseModel):
 
 
 
+DoctorUpdateSchema = partial_schema(DoctorCreateSchema)
+
+
 class DoctorSchema(DoctorCreateSchema):
     id: int
+    version: int = 1
     user_id: Optional[int] = None   
     is_available: bool
     hospital_name: Optional[str] = None
@@ -191,8 +221,12 @@ class AppointmentCreateSchema(BaseModel):
     notes: Optional[str] = None
 
 
+AppointmentUpdateSchema = partial_schema(AppointmentCreateSchema, not_null={"status"})
+
+
 class AppointmentSchema(AppointmentCreateSchema):
     id: int
+    version: int = 1
     status: str
     notes: Optional[str] = None
     created_at: datetime
@@ -217,8 +251,12 @@ class HospitalCreateSchema(BaseModel):
     longitude: Optional[float] = None
 
 
+HospitalUpdateSchema = partial_schema(HospitalCreateSchema)
+
+
 class HospitalSchema(HospitalCreateSchema):
     id: int
+    version: int = 1
     is_active: bool
     created_at: datetime
     doctor_count: int = 0
@@ -226,6 +264,26 @@ class HospitalSchema(HospitalCreateSchema):
     model_config = ConfigDict(from_attributes=True)
 
 
+class NearbyHospitalSchema(HospitalSchema):
+    distance_km: float
+
+
+class HospitalDailyStatsSchema(BaseModel):
+    appointment_date: date
+    status: str
+    appointment_count: int
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
+class HospitalStatsSchema(BaseModel):
+    hospital_id: int
+    doctor_count: int = 0
+    appointment_count: int = 0
+    by_status: dict[str, int] = {}
+    by_day: List[HospitalDailyStatsSchema] = []
+
+
 class DepartmentCreateSchema(BaseModel):
     name: str
     description: Optional[str] = None
@@ -246,6 +304,12 @@ class DoctorScheduleCreateSchema(BaseModel):
     end_time: str    
     slot_duration: int = 30
 
+    @field_validator("slot_duration")
+    def positive_slot_duration(cls, value):
+        if value <= 0:
+            raise ValueError("slot_duration must be positive")
+        return value
+
 
 class DoctorScheduleSchema(DoctorScheduleCreateSchema):
     id: int
@@ -255,6 +319,18 @@ class DoctorScheduleSchema(DoctorScheduleCreateSchema):
 
 
 
+class SlotSchema(BaseModel):
+    date: date
+    start_time: time
+    end_time: time
+
+
+class DoctorAvailabilitySchema(BaseModel):
+    doctor_id: int
+    slots: List[SlotSchema]
+
+
+
 PermissionSchema.model_rebuild()
 RoleSchema.model_rebuild()
 
@@ -268,8 +344,12 @@ class PrescriptionCreateSchema(BaseModel):
     instructions: Optional[str] = None
 
 
+PrescriptionUpdateSchema = partial_schema(PrescriptionCreateSchema)
+
+
 class PrescriptionSchema(PrescriptionCreateSchema):
     id: int
+    version: int = 1
     prescribed_date: date
     model_config = ConfigDict(from_attributes=True)
 
@@ -284,8 +364,72 @@ class MedicalRecordCreateSchema(BaseModel):
     recommendations: Optional[str] = None
     next_visit_date: Optional[date] = None
 
+MedicalRecordUpdateSchema = partial_schema(MedicalRecordCreateSchema)
+
+
 class MedicalRecordSchema(MedicalRecordCreateSchema):
     id: int
+    version: int = 1
     created_at: datetime
     prescriptions: List[PrescriptionSchema] = []
     model_config = ConfigDict(from_attributes=True)
+
+
+class AgendaEntrySchema(BaseModel):
+    appointment_id: int
+    appointment_time: time
+    status: str
+    symptoms: Optional[str] = None
+    patient_id: int
+    patient_name: str
+    doctor_id: int
+    doctor_name: str
+
+
+class DayAgendaSchema(BaseModel):
+    date: date
+    entries: List[AgendaEntrySchema]
+
+
+class TimelineEntrySchema(BaseModel):
+    kind: str
+    at: datetime
+    id: int
+    appointment: Optional[AppointmentSchema] = None
+    medical_record: Optional[MedicalRecordSchema] = None
+
+
+class SyncChangeSchema(BaseModel):
+    table: str
+    id: int
+    operation: str
+    data: Optional[dict] = None
+
+
+class SyncPageSchema(BaseModel):
+    changes: List[SyncChangeSchema]
+    cursor: int
+    has_more: bool
+
+
+class BulkRowResultSchema(BaseModel):
+    index: int
+    status: str
+    id: Optional[int] = None
+    errors: Optional[List[str]] = None
+
+
+class BulkResultSchema(BaseModel):
+    created: int = 0
+    updated: int = 0
+    skipped: int = 0
+    failed: int = 0
+    results: List[BulkRowResultSchema]
+
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
@@ -2,36 +2,96 @@ from passlib.hash import argon2
 from fastapi import HTTPException, status
 from server.settings import (
     JWT_ALGORITHM, JWT_SECRET_KEY, 
-    ACCESSTOKEN_EXPIRED_TIME, REFRESHTOKEN_EXPIRED_TIME)
+    ACCESSTOKEN_EXPIRED_TIME, REFRESHTOKEN_EXPIRED_TIME,
+    HASHING_WORKERS, HASHING_QUEUE_LIMIT,
+    ARGON2_TIME_COST, ARGON2_MEMORY_COST, ARGON2_PARALLELISM)
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import statistics
+import time
 import jwt
+import uuid
 from datetime import datetime, timedelta, timezone
 
 
+# argon2-cffi GIL-ро озод мекунад, бинобар ин thread pool кифоя аст
+hashing_executor = ThreadPoolExecutor(max_workers=HASHING_WORKERS, thread_name_prefix="argon2")
+_pending_hashing_jobs = 0
 
+password_hasher = argon2.using(
+    rounds=ARGON2_TIME_COST, memory_cost=ARGON2_MEMORY_COST, parallelism=ARGON2_PARALLELISM)
 
 
 def hash_password(password):
-    return argon2.hash(password)
+    return password_hasher.hash(password)
 
 def verify_password(password, hashed_password):
-    return argon2.verify(password, hashed_password)
+    return password_hasher.verify(password, hashed_password)
+
+def password_needs_rehash(hashed_password):
+    # Hash бо параметрҳои кӯҳна сохта шудааст
+    return password_hasher.needs_update(hashed_password)
+
+
+def calibrate_argon2(target_ms:float, memory_cost:int=ARGON2_MEMORY_COST, parallelism:int=ARGON2_PARALLELISM, samples:int=5):
+    """time_cost-ро то он даме зиёд мекунад, ки вақти hash ба target_ms расад."""
+    time_cost = 1
+    while True:
+        hasher = argon2.using(rounds=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            hasher.hash("calibration-password")
+            timings.append((time.perf_counter() - started) * 1000)
+        elapsed_ms = statistics.median(timings)
+        if elapsed_ms >= target_ms or time_cost >= 100:
+            return {
+                "time_cost":time_cost,
+                "memory_cost":memory_cost,
+                "parallelism":parallelism,
+                "elapsed_ms":round(elapsed_ms, 1),
+            }
+        time_cost += 1
+
+
+async def run_in_hashing_pool(func, *args):
+    global _pending_hashing_jobs
+    if _pending_hashing_jobs >= HASHING_WORKERS + HASHING_QUEUE_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, try again later",
+            headers={"Retry-After": "1"})
+    _pending_hashing_jobs += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(hashing_executor, func, *args)
+    finally:
+        _pending_hashing_jobs -= 1
+
+async def async_hash_password(password):
+    return await run_in_hashing_pool(hash_password, password)
+
+async def async_verify_password(password, hashed_password):
+    return await run_in_hashing_pool(verify_password, password, hashed_password)
 
 
 def generate_token(payload, expired_time):
     current_time = datetime.now(timezone.utc)
     payload.update({
+        "jti":uuid.uuid4().hex,
         "iat":current_time,
         "exp":current_time + expired_time
     })
     return jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
 
 
-def create_access_token(username, user_id):
+def create_access_token(username, user_id, claims:dict=None):
     payload = {
         "sub":str(user_id),
         "username":username,
         "type":"access",
     }
+    if claims:
+        payload.update(claims)
     return generate_token(payload, ACCESSTOKEN_EXPIRED_TIME)
 
 
@@ -1,11 +1,18 @@
 from fastapi import HTTPException, status
 from .security import decode_jwt
-from .models import BlackListTokens
+from .revocation import is_token_revoked
+from .cache import token_cache
 
-def validate_access_token(token:str, db):
+async def validate_access_token(token:str, db):
+    credentials = token_cache.get(token)
+    if credentials is not None and credentials["type"] == "access":
+        return credentials
     credentials = decode_jwt(token)
-    is_blocked_token = db.query(BlackListTokens).filter(BlackListTokens.token == token).first()
-    if is_blocked_token:
+    if "jti" not in credentials:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid token")
+    if await is_token_revoked(credentials["jti"], db):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Token already blocked")
@@ -13,21 +20,26 @@ def validate_access_token(token:str, db):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid token")
+    token_cache.set(token, credentials)
     return credentials
 
-def validate_refresh_token(token:str, db):
-    is_blocked_token = db.query(BlackListTokens).filter(BlackListTokens.token == token).first()
-    if is_blocked_token:
+async def validate_refresh_token(token:str, db):
+    credentials = token_cache.get(token)
+    if credentials is not None and credentials["type"] == "refresh":
+        return credentials
+    credentials = decode_jwt(token)
+    if "jti" not in credentials:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid token")
+    if await is_token_revoked(credentials["jti"], db):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Token already blocked")
     
-    credentials = decode_jwt(token)
     if credentials["type"] != "refresh":
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid token")
+    token_cache.set(token, credentials)
     return credentials
-
-
-
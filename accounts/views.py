@@ -1,6 +1,8 @@
 from fastapi import APIRouter
 from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from server.settings import get_db
 from .models import *
 from .schemas import *
@@ -8,62 +10,56 @@ from .helpers import *
 from .security import *
 from .validators import *
 from .permissions import *
+from .cache import token_cache, permission_cache
+from .revocation import revoke_token
 
 auth = APIRouter()
 
 
 
 @auth.post("/register", response_model=UserSchema)
-async def register_api_view(data: RegisterSchema, db: Session = Depends(get_db)):
-    user = get_user(username=data.username, db=db)
+async def register_api_view(data: RegisterSchema, db: AsyncSession = Depends(get_db)):
+    user = await get_user(username=data.username, db=db)
     if user is not None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User already exists!")
 
-    password_hash = hash_password(data.password)
-    new_user = User(username=data.username, password=password_hash)
+    password_hash = await async_hash_password(data.password)
+    patient_role = await db.scalar(select(Role).filter(Role.name == "patient"))
+    new_user = User(username=data.username, password=password_hash, roles=[patient_role] if patient_role else [])
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
 
-    patient_role = db.query(Role).filter(Role.name == "patient").first()
-    if patient_role:
-        new_user.roles.append(patient_role)
-        db.commit()
-        db.refresh(new_user)
-
-    return new_user
+    return await get_user(user_id=new_user.id, db=db)
 
 
 
 @auth.post("/add-user", dependencies=[Depends(is_admin_user), Depends(role_required(["admin"]))], response_model=UserSchema)
-async def add_user_api_view(data:AddUserSchema, db:Session=Depends(get_db)):
-    q = get_user(username=data.username, db=db)
+async def add_user_api_view(data:AddUserSchema, db:AsyncSession=Depends(get_db)):
+    q = await get_user(username=data.username, db=db)
     if q is not None:   
         raise HTTPException(detail="User already exists!", status_code=status.HTTP_400_BAD_REQUEST)
-    user = create_user(data=data, db=db)
+    user = await create_user(data=data, db=db)
     return user
 
 
 @auth.post("/login")
-async def register_api_view(data:LoginSchema, db:Session=Depends(get_db)):
-    user = authenticate(username=data.username, password=data.password, db=db)
+async def register_api_view(data:LoginSchema, db:AsyncSession=Depends(get_db)):
+    user = await authenticate(username=data.username, password=data.password, db=db)
     if not user:
         raise HTTPException(detail="Invalid credentials!", status_code=status.HTTP_400_BAD_REQUEST)
     
     return {
         "refresh":create_refresh_token(user.username, user.id),
-        "access":create_access_token(user.username, user.id)
+        "access":await issue_access_token(user.username, user.id, db)
     }
 
 
 @auth.post("/logout", dependencies=[Depends(is_authenticated)])
-async def logout_api_view(token:str, db:Session=Depends(get_db)):
-    is_valid_token = validate_refresh_token(token, db)
+async def logout_api_view(token:str, db:AsyncSession=Depends(get_db)):
+    is_valid_token = await validate_refresh_token(token, db)
     if is_valid_token is not None:
-        blocked_token = BlackListTokens(token=token)
-        db.add(blocked_token)
-        db.commit()
-        db.refresh(blocked_token)
+        await revoke_token(is_valid_token, db)
+        token_cache.invalidate(token)
         return {
             "message":"logged out user",
             "status":status.HTTP_200_OK
@@ -73,14 +69,15 @@ async def logout_api_view(token:str, db:Session=Depends(get_db)):
 
 
 @auth.post("/refresh", dependencies=[Depends(is_authenticated)])
-async def refresh_token(token:str, db:Session=Depends(get_db)):
-    is_valid_token = validate_refresh_token(token=token, db=db)
+async def refresh_token(token:str, db:AsyncSession=Depends(get_db)):
+    is_valid_token = await validate_refresh_token(token=token, db=db)
     if is_valid_token:
         return {
             "refresh":token,
-            "access":create_access_token(
+            "access":await issue_access_token(
                 username=is_valid_token["username"],
-                user_id=int(is_valid_token["sub"]))
+                user_id=int(is_valid_token["sub"]),
+                db=db)
         }
     raise HTTPException(
         status_code=status.HTTP_400_BAD_REQUEST,
@@ -94,11 +91,11 @@ async def get_profile(user=Depends(get_current_user)):
 
 
 @auth.post("/set-permissions-to-user", dependencies=[Depends(is_admin_user)], response_model=UserSchema)
-async def set_permissions_to_user_api_view(data:SetUserPermissionsSchema, db:Session=Depends(get_db)):
-    user = get_user(user_id=data.user_id, db=db)
+async def set_permissions_to_user_api_view(data:SetUserPermissionsSchema, db:AsyncSession=Depends(get_db)):
+    user = await get_user(user_id=data.user_id, db=db)
     if not user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User doedn't exists!")
-    permissions = db.query(Permission).filter(Permission.id.in_(data.permissions)).all()
+    permissions = (await db.scalars(select(Permission).filter(Permission.id.in_(data.permissions)))).all()
     print(permissions)
     if not permissions:
         print("error")
@@ -107,26 +104,26 @@ async def set_permissions_to_user_api_view(data:SetUserPermissionsSchema, db:Ses
     for perm in permissions:
         if perm not in user.permissions:
             user.permissions.append(perm)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    permission_cache.invalidate(user.id)
+    await bump_permission_graph_version(db)
     return user
 
 
 @auth.post("/add-role", response_model=RoleSchema)
-async def create_role_api_view(data:AddRoleSchema, db:Session=Depends(get_db)):
-    role = Role(name=data.name)
+async def create_role_api_view(data:AddRoleSchema, db:AsyncSession=Depends(get_db)):
+    role = Role(name=data.name, permissions=[])
     db.add(role)
-    db.commit()
-    db.refresh(role)
+    await db.commit()
     return role
 
 
 @auth.post("/add-permissions-to-role", response_model=RoleSchema)
-async def add_permissions_to_role(data:SetRolePermissionsSchema, db:Session=Depends(get_db)):
-    role = db.query(Role).filter(Role.id==data.role_id).first()
+async def add_permissions_to_role(data:SetRolePermissionsSchema, db:AsyncSession=Depends(get_db)):
+    role = await db.scalar(select(Role).options(selectinload(Role.permissions)).filter(Role.id==data.role_id))
     if not role:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Role not found!")
-    permissions = db.query(Permission).filter(Permission.id.in_(data.permissions)).all()
+    permissions = (await db.scalars(select(Permission).filter(Permission.id.in_(data.permissions)))).all()
     print(permissions)
     if not permissions:
         print("error")
@@ -135,25 +132,27 @@ async def add_permissions_to_role(data:SetRolePermissionsSchema, db:Session=Depe
     for perm in permissions:
         if perm not in role.permissions:
             role.permissions.append(perm)
-    db.commit()
-    db.refresh(role)
+    await db.commit()
+    permission_cache.clear()
+    await bump_permission_graph_version(db)
     return role
 
 
 @auth.post("/add-role-to-user", response_model=UserSchema)
-async def add_role_to_user_view(data:SetRoleToUserSchema, db:Session=Depends(get_db)):
-    user = get_user(user_id=data.user_id, db=db)
+async def add_role_to_user_view(data:SetRoleToUserSchema, db:AsyncSession=Depends(get_db)):
+    user = await get_user(user_id=data.user_id, db=db)
     if not user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User does not exists!")
-    roles = db.query(Role).filter(Role.id.in_(data.roles)).all()
+    roles = (await db.scalars(select(Role).options(selectinload(Role.permissions)).filter(Role.id.in_(data.roles)))).all()
     if not roles:
         raise HTTPException(detail="Roles doesn't exists", status_code=status.HTTP_400_BAD_REQUEST)
     
     for r in roles:
         if r not in user.roles:
             user.roles.append(r)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    permission_cache.invalidate(user.id)
+    await bump_permission_graph_version(db)
     return user
 
 
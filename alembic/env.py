@@ -25,6 +25,15 @@ if config.config_file_name is not None:
 config.set_main_option("sqlalchemy.url", SQLALCHEMY_DATABASE_URL)
 target_metadata = BaseModel.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    # Ҷадвалҳои FTS5 ва индексҳои pg_trgm-и server/search.py дар metadata нестанд
+    if type_ == "table" and reflected and name.endswith(("_fts", "_fts_data", "_fts_idx", "_fts_docsize", "_fts_config")):
+        return False
+    if type_ == "index" and reflected and name.endswith("_search_trgm"):
+        return False
+    return True
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -48,6 +57,7 @@ def run_migrations_offline() -> None:
         url=url,
         target_metadata=target_metadata,
         literal_binds=True,
+        include_object=include_object,
         dialect_opts={"paramstyle": "named"},
     )
 
@@ -70,7 +80,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_object=include_object
         )
 
         with context.begin_transaction():
@@ -0,0 +1,64 @@
+"""search indexes
+
+Revision ID: 7fd9f6f21fb2
+Revises: 9f786ba774b3
+Create Date: 2026-10-18 16:01:16.004908
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7fd9f6f21fb2'
+down_revision: Union[str, Sequence[str], None] = '9f786ba774b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCH_COLUMNS = {
+    "patients": ("first_name", "last_name", "middle_name", "phone", "passport_number"),
+    "doctors": ("first_name", "last_name", "middle_name", "specialization", "license_number"),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect_name = op.get_bind().dialect.name
+    for source, columns in SEARCH_COLUMNS.items():
+        if dialect_name == "sqlite":
+            fts = f"{source}_fts"
+            names = ", ".join(columns)
+            new_values = ", ".join(f"new.{name}" for name in columns)
+            old_values = ", ".join(f"old.{name}" for name in columns)
+            op.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({names}, content='{source}', content_rowid='id', tokenize='trigram')")
+            op.execute(
+                f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {source} BEGIN "
+                f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values}); END")
+            op.execute(
+                f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {source} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values}); END")
+            op.execute(
+                f"CREATE TRIGGER {fts}_au AFTER UPDATE ON {source} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values}); "
+                f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values}); END")
+            op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        elif dialect_name == "postgresql":
+            expression = " || ' ' || ".join(f"coalesce({name}, '')" for name in columns)
+            op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            op.execute(f"CREATE INDEX ix_{source}_search_trgm ON {source} USING gin (({expression}) gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect_name = op.get_bind().dialect.name
+    for source in SEARCH_COLUMNS:
+        if dialect_name == "sqlite":
+            fts = f"{source}_fts"
+            for suffix in ("ai", "ad", "au"):
+                op.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+            op.execute(f"DROP TABLE IF EXISTS {fts}")
+        elif dialect_name == "postgresql":
+            op.execute(f"DROP INDEX IF EXISTS ix_{source}_search_trgm")
@@ -0,0 +1,35 @@
+"""change log autoincrement
+
+Revision ID: b5e1f0c2d7a4
+Revises: 3abd7b4ed34d
+Create Date: 2026-10-18 17:20:41.118503
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e1f0c2d7a4'
+down_revision: Union[str, Sequence[str], None] = '3abd7b4ed34d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Танҳо SQLite rowid-и ҳазфшударо дубора медиҳад; ҷадвал бо AUTOINCREMENT аз нав сохта мешавад
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    with op.batch_alter_table("change_log", recreate="always", table_kwargs={"sqlite_autoincrement": True}):
+        pass
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    with op.batch_alter_table("change_log", recreate="always", table_kwargs={"sqlite_autoincrement": False}):
+        pass
@@ -0,0 +1,59 @@
+"""p99 латентнокӣ зери бори параллелӣ: Session-и синхронӣ дар async handler (пеш) ва AsyncSession (баъд).
+
+    python -m bench.async_db_p99 --requests 5000 --concurrency 100
+"""
+import argparse
+import asyncio
+import random
+from datetime import date
+
+from bench.common import Server, login, prepare_database, report, run_load
+
+
+def seed_patients(count: int):
+    from sqlalchemy import insert
+    from accounts.models import Patient
+    from server.settings import engine
+
+    rows = [{
+        "first_name": f"First{i}", "last_name": f"Last{i}", "birth_date": date(1990, 1, 1), "gender": "m",
+        "passport_number": f"P{i:08d}", "phone": "1", "address": "a", "region": "Sughd",
+        "emergency_contact": "c", "emergency_phone": "2",
+    } for i in range(count)]
+    with engine.begin() as connection:
+        connection.execute(insert(Patient), rows)
+
+
+def request_mix(prefix: str, total: int, patients: int, list_share: float, page_size: int):
+    random.seed(42)
+    requests = []
+    for _ in range(total):
+        if random.random() < list_share:
+            requests.append(("GET", f"{prefix}/patients?limit={page_size}", None))
+        else:
+            requests.append(("GET", f"{prefix}/patients/{random.randint(1, patients)}", None))
+    return requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--patients", type=int, default=20000)
+    parser.add_argument("--list-share", type=float, default=0.1, help="Ҳиссаи дархостҳои рӯйхат (query-и вазнинтар)")
+    parser.add_argument("--page-size", type=int, default=200)
+    args = parser.parse_args()
+
+    env = prepare_database()
+    seed_patients(args.patients)
+    with Server(env) as server:
+        headers = login(server.base_url)
+        for name, prefix in (("before: sync session", "/bench/blocking"), ("after: async session", "")):
+            requests = request_mix(prefix, args.requests, args.patients, args.list_share, args.page_size)
+            asyncio.run(run_load(server.base_url, requests[:200], args.concurrency, headers))  # гарм кардан
+            latencies, codes, elapsed = asyncio.run(run_load(server.base_url, requests, args.concurrency, headers))
+            report(name, latencies, codes, elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Ёрирасонҳои benchmark: база ва uvicorn дар process-и алоҳида, бор бо httpx ва percentile-ҳо."""
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import httpx
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def prepare_database() -> dict:
+    """Базаи SQLite-и муваққатӣ бо ҷадвалҳо; env-ро барои server бармегардонад."""
+    directory = tempfile.mkdtemp(prefix="clinic-bench-")
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{directory}/bench.db",
+        "JWT_SECRET_KEY": os.environ.get("JWT_SECRET_KEY", "bench-secret"),
+    }
+    env.pop("ASYNC_DATABASE_URL", None)
+    env.pop("READ_REPLICA_URLS", None)
+    os.environ.update({key: env[key] for key in ("DATABASE_URL", "JWT_SECRET_KEY")})
+    sys.path.insert(0, str(BASE_DIR))
+
+    from server.settings import SessionLocal, engine
+    from server.models import BaseModel
+    import server.search  # noqa: F401  DDL-и FTS5
+    from accounts.models import PermissionGraphVersion
+
+    BaseModel.metadata.create_all(engine)
+    with SessionLocal() as session:
+        session.add(PermissionGraphVersion(version=1))
+        session.commit()
+    return env
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Server:
+    """uvicorn бо як worker, то ки event loop-и ягона чен карда шавад."""
+
+    def __init__(self, env: dict, app: str = "bench.routes:app", extra_env: dict = None):
+        self.port = _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", app, "--port", str(self.port), "--log-level", "warning"],
+            cwd=BASE_DIR, env={**env, **(extra_env or {})},
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        )
+
+    def __enter__(self):
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(self.process.stderr.read().decode())
+            try:
+                httpx.get(f"{self.base_url}/docs", timeout=1)
+                return self
+            except httpx.TransportError:
+                time.sleep(0.2)
+        raise RuntimeError("Server did not start")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait(10)
+
+    def memory_mb(self) -> dict:
+        # Linux: RssAnon - heap ва ғ., RssFile - саҳифаҳои файл (mmap-и SQLite низ)
+        fields = {}
+        for line in Path(f"/proc/{self.process.pid}/status").read_text().splitlines():
+            key, _, value = line.partition(":")
+            if key in ("RssAnon", "RssFile"):
+                fields[key] = int(value.split()[0]) / 1024
+        return fields
+
+    @contextmanager
+    def sample_memory(self, interval: float = 0.05):
+        """Ҳангоми блок ҳадди аксари RssAnon/RssFile-ро ҷамъ мекунад."""
+        peaks = dict(self.memory_mb())
+        stop = threading.Event()
+
+        def sample():
+            while not stop.wait(interval):
+                for key, value in self.memory_mb().items():
+                    peaks[key] = max(peaks[key], value)
+
+        thread = threading.Thread(target=sample, daemon=True)
+        thread.start()
+        try:
+            yield peaks
+        finally:
+            stop.set()
+            thread.join()
+
+
+def login(base_url: str, username: str = "bench", password: str = "bench-password") -> dict:
+    httpx.post(f"{base_url}/auth/register", json={"username": username, "password": password, "confirm_password": password})
+    tokens = httpx.post(f"{base_url}/auth/login", json={"username": username, "password": password}, timeout=30).json()
+    return {"Authorization": f"Bearer {tokens['access']}"}
+
+
+async def run_load(base_url: str, requests, concurrency: int, headers: dict = None):
+    """requests - рӯйхати (method, path, json); (latency-ҳо бо ms, status code-ҳо, вақти умумӣ) бармегардонад."""
+    queue = asyncio.Queue()
+    for request in requests:
+        queue.put_nowait(request)
+    latencies, codes = [], []
+
+    async def worker(client):
+        while not queue.empty():
+            method, path, body = queue.get_nowait()
+            started = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append((time.perf_counter() - started) * 1000)
+            codes.append(response.status_code)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=120) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return latencies, codes, elapsed
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))] if ordered else float("nan")
+
+
+def report(name: str, latencies, codes, elapsed: float):
+    failed = sum(1 for code in codes if code >= 400)
+    print(
+        f"{name:<28} n={len(latencies):<6} rps={len(latencies) / elapsed:8.1f}  "
+        f"p50={percentile(latencies, 0.5):8.1f}ms  p99={percentile(latencies, 0.99):8.1f}ms  "
+        f"max={max(latencies, default=float('nan')):8.1f}ms  mean={statistics.fmean(latencies) if latencies else float('nan'):7.1f}ms  "
+        f"errors={failed}"
+    )
@@ -0,0 +1,72 @@
+"""Export-и миллион сатр: вақт, суръат ва хотираи server (RssAnon бояд ҳамвор монад).
+
+RssFile бо андозаи база то SQLITE_MMAP_SIZE меафзояд - ин саҳифаҳои файл аст, на heap.
+
+    python -m bench.export_rows --rows 1000000 --format ndjson
+"""
+import argparse
+import time
+from datetime import date
+
+import httpx
+
+from bench.common import Server, login, prepare_database
+
+SEED_BATCH = 50000
+
+
+def seed_patients(count: int):
+    from sqlalchemy import insert
+    from accounts.models import Patient
+    from server.settings import engine
+
+    for start in range(0, count, SEED_BATCH):
+        rows = [{
+            "first_name": f"First{i}", "last_name": f"Last{i}", "birth_date": date(1990, 1, 1), "gender": "m",
+            "passport_number": f"P{i:08d}", "phone": "1", "address": "a", "region": "Sughd",
+            "emergency_contact": "c", "emergency_phone": "2",
+        } for i in range(start, min(start + SEED_BATCH, count))]
+        with engine.begin() as connection:
+            connection.execute(insert(Patient), rows)
+
+
+def export(base_url: str, headers: dict, format: str, params: dict = None):
+    started = time.perf_counter()
+    first_byte = None
+    lines = size = 0
+    with httpx.stream("GET", f"{base_url}/patients/export", params={"format": format, **(params or {})},
+                      headers=headers, timeout=None) as response:
+        response.raise_for_status()
+        for chunk in response.iter_bytes():
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            lines += chunk.count(b"\n")
+            size += len(chunk)
+    return lines, size, first_byte or 0, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    args = parser.parse_args()
+
+    env = prepare_database()
+    print(f"Seeding {args.rows} patients...")
+    seed_patients(args.rows)
+    with Server(env) as server:
+        headers = login(server.base_url)
+        export(server.base_url, headers, args.format, {"region": "none"})
+        baseline = server.memory_mb()
+        with server.sample_memory() as peaks:
+            lines, size, first_byte, elapsed = export(server.base_url, headers, args.format)
+
+    print(f"lines={lines} size={size / 2**20:.1f}MiB first_byte={first_byte * 1000:.0f}ms "
+          f"total={elapsed:.1f}s rows/s={lines / elapsed:,.0f}")
+    for key in ("RssAnon", "RssFile"):
+        print(f"server {key}: before {baseline[key]:.1f}MiB, peak during export {peaks[key]:.1f}MiB "
+              f"(+{peaks[key] - baseline[key]:.1f}MiB)")
+
+
+if __name__ == "__main__":
+    main()
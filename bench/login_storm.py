@@ -0,0 +1,51 @@
+"""Login storm: Argon2 дар event loop (пеш) ва дар hashing pool (баъд).
+
+Ҳамзамон бо login-ҳо дархостҳои сабук (GET /hospitals) фиристода мешаванд: p99-и онҳо
+нишон медиҳад, ки event loop ҳангоми hash банд мешавад ё не. 503 - навбати pool пур аст.
+
+    python -m bench.login_storm --logins 500 --concurrency 100
+"""
+import argparse
+import asyncio
+
+from bench.common import Server, login, prepare_database, report, run_load
+
+
+async def storm(base_url, login_path, logins, concurrency, probes, headers):
+    credentials = {"username": "bench", "password": "bench-password"}
+    login_requests = [("POST", login_path, credentials)] * logins
+    probe_requests = [("GET", "/hospitals", None)] * probes
+    return await asyncio.gather(
+        run_load(base_url, login_requests, concurrency),
+        run_load(base_url, probe_requests, 4, headers),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--probes", type=int, default=400)
+    parser.add_argument("--hashing-workers", type=int, default=None, help="HASHING_WORKERS барои server")
+    parser.add_argument("--queue-limit", type=int, default=None, help="HASHING_QUEUE_LIMIT барои server")
+    args = parser.parse_args()
+
+    env = prepare_database()
+    extra_env = {}
+    if args.hashing_workers is not None:
+        extra_env["HASHING_WORKERS"] = str(args.hashing_workers)
+    if args.queue_limit is not None:
+        extra_env["HASHING_QUEUE_LIMIT"] = str(args.queue_limit)
+
+    with Server(env, extra_env=extra_env) as server:
+        headers = login(server.base_url)
+        for name, path in (("before: inline argon2", "/bench/blocking/login"), ("after: hashing pool", "/auth/login")):
+            (login_latencies, login_codes, login_elapsed), (probe_latencies, probe_codes, probe_elapsed) = asyncio.run(
+                storm(server.base_url, path, args.logins, args.concurrency, args.probes, headers))
+            report(f"{name} login", login_latencies, login_codes, login_elapsed)
+            report(f"{name} probe", probe_latencies, probe_codes, probe_elapsed)
+            print(f"{'':<28} 503 responses: {login_codes.count(503)}")
+
+
+if __name__ == "__main__":
+    main()
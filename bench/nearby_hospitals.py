@@ -0,0 +1,74 @@
+"""GET /hospitals/nearby: bounding box аз рӯи ix_hospitals_lat_lon (баъд) ва haversine барои тамоми ҷадвал (пеш).
+
+    python -m bench.nearby_hospitals --hospitals 50000 --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import random
+
+import httpx
+
+from bench.common import Server, login, prepare_database, report, run_load
+
+# Тақрибан ҳудуди Тоҷикистон
+MIN_LAT, MAX_LAT = 36.7, 41.0
+MIN_LON, MAX_LON = 67.3, 75.1
+
+
+def seed_hospitals(count: int):
+    from sqlalchemy import insert
+    from accounts.models import Hospital
+    from server.settings import engine
+
+    random.seed(7)
+    rows = [{
+        "name": f"Hospital {i}", "region": "Sughd", "city": "Khujand", "address": "a", "phone": "1",
+        "latitude": random.uniform(MIN_LAT, MAX_LAT), "longitude": random.uniform(MIN_LON, MAX_LON),
+    } for i in range(count)]
+    with engine.begin() as connection:
+        connection.execute(insert(Hospital), rows)
+
+
+def query_points(total: int):
+    random.seed(42)
+    return [(random.uniform(MIN_LAT, MAX_LAT), random.uniform(MIN_LON, MAX_LON)) for _ in range(total)]
+
+
+def nearby_requests(path: str, points, radius: float):
+    return [("GET", f"{path}?lat={lat}&lon={lon}&radius={radius}", None) for lat, lon in points]
+
+
+def check_same_results(base_url: str, headers: dict, points, radius: float):
+    # Ҳарду роут бояд ҳамон беморхонаҳоро бо ҳамон тартиб баргардонанд
+    for lat, lon in points:
+        params = {"lat": lat, "lon": lon, "radius": radius}
+        before = httpx.get(f"{base_url}/bench/full_scan/hospitals/nearby", params=params, headers=headers, timeout=60)
+        after = httpx.get(f"{base_url}/hospitals/nearby", params=params, headers=headers, timeout=60)
+        if [item["id"] for item in before.json()] != [item["id"] for item in after.json()]:
+            raise SystemExit(f"Results differ for lat={lat} lon={lon}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hospitals", type=int, default=50000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--radius", type=float, default=10)
+    args = parser.parse_args()
+
+    env = prepare_database()
+    seed_hospitals(args.hospitals)
+    points = query_points(args.requests)
+    with Server(env) as server:
+        headers = login(server.base_url)
+        check_same_results(server.base_url, headers, points[:20], args.radius)
+        for name, path in (("before: full-table haversine", "/bench/full_scan/hospitals/nearby"),
+                           ("after: bounding box + index", "/hospitals/nearby")):
+            requests = nearby_requests(path, points, args.radius)
+            asyncio.run(run_load(server.base_url, requests[:50], args.concurrency, headers))  # гарм кардан
+            latencies, codes, elapsed = asyncio.run(run_load(server.base_url, requests, args.concurrency, headers))
+            report(name, latencies, codes, elapsed)
+
+
+if __name__ == "__main__":
+    main()
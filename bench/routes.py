@@ -0,0 +1,60 @@
+"""Барномаи benchmark: ҳамон server.routers:app ва роутҳои "пеш аз" бо намунаи кӯҳна.
+
+Роутҳои /bench/blocking/* кори пешинаро такрор мекунанд: async def, вале Session-и
+синхронӣ ва Argon2 бевосита дар event loop. /bench/full_scan/hospitals/nearby тамоми
+беморхонаҳоро бе bounding box мехонад ва haversine-ро барои ҳар сатр ҳисоб мекунад.
+Онҳо танҳо дар benchmark сабт мешаванд.
+"""
+from fastapi import Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from accounts.models import Hospital, Patient, User
+from accounts.permissions import is_authenticated
+from accounts.security import verify_password
+from accounts.schemas import HospitalSchema, LoginSchema, NearbyHospitalSchema, Page, PatientSchema
+from server.geo import haversine_km
+from server.loaders import HOSPITAL_PROFILE
+from server.routers import app
+from server.settings import PAGE_SIZE_DEFAULT, SessionLocal, get_db
+
+
+@app.get("/bench/blocking/patients/{patient_id}", dependencies=[Depends(is_authenticated)])
+async def blocking_get_patient(patient_id: int):
+    with SessionLocal() as db:
+        patient = db.get(Patient, patient_id)
+        if not patient:
+            raise HTTPException(status_code=404, detail="Patient not found")
+        return PatientSchema.model_validate(patient)
+
+
+@app.get("/bench/blocking/patients", dependencies=[Depends(is_authenticated)])
+async def blocking_get_patients(limit: int = PAGE_SIZE_DEFAULT):
+    with SessionLocal() as db:
+        patients = db.scalars(select(Patient).order_by(Patient.id).limit(limit)).all()
+        return Page[PatientSchema](items=[PatientSchema.model_validate(patient) for patient in patients])
+
+
+@app.post("/bench/blocking/login")
+async def blocking_login(data: LoginSchema):
+    with SessionLocal() as db:
+        user = db.scalar(select(User).filter(User.username == data.username))
+    if not user or not verify_password(data.password, user.password):
+        raise HTTPException(status_code=400, detail="Invalid credentials!")
+    return {"detail": "ok"}
+
+
+@app.get("/bench/full_scan/hospitals/nearby", dependencies=[Depends(is_authenticated)])
+async def full_scan_nearby_hospitals(lat: float, lon: float, radius: float = 10, limit: int = 20,
+                                     db: AsyncSession = Depends(get_db)):
+    hospitals = (await db.scalars(select(Hospital).options(*HOSPITAL_PROFILE).filter(
+        Hospital.is_active.is_(True), Hospital.latitude.is_not(None), Hospital.longitude.is_not(None)))).all()
+    ranked = sorted(
+        (item for item in ((hospital, haversine_km(lat, lon, hospital.latitude, hospital.longitude)) for hospital in hospitals)
+         if item[1] <= radius),
+        key=lambda item: item[1],
+    )
+    return [
+        NearbyHospitalSchema(**HospitalSchema.model_validate(hospital).model_dump(), distance_km=round(distance, 3))
+        for hospital, distance in ranked[:limit]
+    ]
@@ -0,0 +1,165 @@
+"""Хондан ва навиштани параллелӣ: journal-и пешфарзи SQLite (пеш) ва WAL бо pragma-ҳои settings (баъд).
+
+Ҳар режим нусхаи алоҳидаи ҳамон базаро мегирад ва ду бор чен карда мешавад:
+  engine - thread-ҳои хонанда ва нависанда бевосита бо sqlite3 (танҳо қулфҳои SQLite);
+  http   - ҳамон бор тавассути API (uvicorn бо як worker), хондан ва навиштан ҳамзамон;
+           агар worker CPU-ро пур кунад, фарқи journal дар ин ҷо камтар намоён аст.
+
+    python -m bench.sqlite_journal --readers 8 --writers 2 --seconds 10
+"""
+import argparse
+import asyncio
+import random
+import shutil
+import sqlite3
+import threading
+import time
+
+from bench.async_db_p99 import seed_patients
+from bench.common import Server, login, prepare_database, report, run_load
+
+
+def modes():
+    from server.settings import (
+        SQLITE_BUSY_TIMEOUT, SQLITE_CACHE_SIZE, SQLITE_JOURNAL_MODE, SQLITE_MMAP_SIZE, SQLITE_SYNCHRONOUS,
+    )
+    # Пешфарзҳои sqlite3 пеш аз create_database_engine (busy timeout-и sqlite3 низ 5 сония буд)
+    return [
+        ("before", {
+            "JOURNAL_MODE": "DELETE", "SYNCHRONOUS": "FULL", "BUSY_TIMEOUT": 5000, "MMAP_SIZE": 0, "CACHE_SIZE": -2000,
+        }),
+        ("after", {
+            "JOURNAL_MODE": SQLITE_JOURNAL_MODE, "SYNCHRONOUS": SQLITE_SYNCHRONOUS, "BUSY_TIMEOUT": SQLITE_BUSY_TIMEOUT,
+            "MMAP_SIZE": SQLITE_MMAP_SIZE, "CACHE_SIZE": SQLITE_CACHE_SIZE,
+        }),
+    ]
+
+
+def connect(path: str, pragmas: dict):
+    connection = sqlite3.connect(path, timeout=pragmas["BUSY_TIMEOUT"] / 1000, check_same_thread=False)
+    for name, value in pragmas.items():
+        if name != "JOURNAL_MODE":
+            connection.execute(f"PRAGMA {name.lower()} = {value}")
+    return connection
+
+
+def set_journal_mode(path: str, journal_mode: str):
+    # journal_mode дар файл нигоҳ дошта мешавад; иваз қулфи истисноӣ мехоҳад, бинобар ин пеш аз thread-ҳо
+    connection = sqlite3.connect(path)
+    connection.execute(f"PRAGMA journal_mode = {journal_mode}")
+    connection.close()
+
+
+def engine_load(path: str, pragmas: dict, readers: int, writers: int, seconds: float, patients: int, page_size: int):
+    """(хондан, навиштан): ҳар кадом (latency-ҳо бо ms, code-ҳо, вақт); "database is locked" = 503."""
+    results = {"read": ([], []), "write": ([], [])}
+    deadline = time.perf_counter() + seconds
+
+    def reader(seed: int):
+        connection, rng = connect(path, pragmas), random.Random(seed)
+        latencies, codes = results["read"]
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                if rng.random() < 0.2:
+                    connection.execute("SELECT * FROM patients ORDER BY last_name, id LIMIT ?", (page_size,)).fetchall()
+                else:
+                    connection.execute("SELECT * FROM patients WHERE id = ?", (rng.randint(1, patients),)).fetchall()
+                codes.append(200)
+            except sqlite3.OperationalError:
+                codes.append(503)
+            latencies.append((time.perf_counter() - started) * 1000)
+        connection.close()
+
+    def writer(seed: int):
+        connection = connect(path, pragmas)
+        latencies, codes = results["write"]
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                with connection:
+                    connection.execute(
+                        "INSERT INTO hospitals (version, name, region, city, address, phone, hospital_type, is_active, created_at) "
+                        "VALUES (1, ?, 'Sughd', 'Khujand', 'a', '1', 'public', 1, CURRENT_TIMESTAMP)", (f"Hospital {seed}",))
+                codes.append(200)
+            except sqlite3.OperationalError:
+                codes.append(503)
+            latencies.append((time.perf_counter() - started) * 1000)
+        connection.close()
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return [(*results[kind], elapsed) for kind in ("read", "write")]
+
+
+def read_requests(total: int, patients: int, page_size: int):
+    random.seed(42)
+    requests = []
+    for _ in range(total):
+        if random.random() < 0.2:
+            requests.append(("GET", f"/patients?limit={page_size}&sort=last_name", None))
+        else:
+            requests.append(("GET", f"/patients/{random.randint(1, patients)}", None))
+    return requests
+
+
+def write_requests(total: int):
+    return [("POST", "/hospitals", {
+        "name": f"Hospital {i}", "region": "Sughd", "city": "Khujand", "address": "a", "phone": "1",
+    }) for i in range(total)]
+
+
+async def mixed_load(base_url: str, reads, writes, concurrency: int, headers: dict):
+    # Ҳиссаи пайвастҳо ба таносуби дархостҳо
+    write_concurrency = max(1, concurrency * len(writes) // (len(reads) + len(writes)))
+    return await asyncio.gather(
+        run_load(base_url, reads, concurrency - write_concurrency, headers),
+        run_load(base_url, writes, write_concurrency, headers),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=20000)
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--reads", type=int, default=4000, help="Дархостҳои хондани http")
+    parser.add_argument("--writes", type=int, default=1000, help="Дархостҳои навиштани http")
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    env = prepare_database()
+    seed_patients(args.patients)
+    from server.settings import engine
+    engine.dispose()  # checkpoint, то файли база бе -wal нусха шавад
+    source = env["DATABASE_URL"].removeprefix("sqlite:///")
+
+    for index, (name, pragmas) in enumerate(modes()):
+        copy = source.replace("bench.db", f"bench-{index}.db")
+        shutil.copyfile(source, copy)
+        set_journal_mode(copy, pragmas["JOURNAL_MODE"])
+        read, write = engine_load(copy, pragmas, args.readers, args.writers, args.seconds, args.patients, args.page_size)
+        report(f"{name} engine reads", *read)
+        report(f"{name} engine writes", *write)
+
+        extra_env = {"DATABASE_URL": f"sqlite:///{copy}", **{f"SQLITE_{key}": str(value) for key, value in pragmas.items()}}
+        with Server(env, extra_env=extra_env) as server:
+            headers = login(server.base_url)
+            reads = read_requests(args.reads, args.patients, args.page_size)
+            writes = write_requests(args.writes)
+            asyncio.run(mixed_load(server.base_url, reads[:200], writes[:50], args.concurrency, headers))  # гарм кардан
+            read, write = asyncio.run(mixed_load(server.base_url, reads, writes, args.concurrency, headers))
+            report(f"{name} http reads", *read)
+            report(f"{name} http writes", *write)
+
+
+if __name__ == "__main__":
+    main()
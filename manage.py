@@ -1,4 +1,53 @@
+import argparse
 import uvicorn
 
+
+def calibrate_argon2(args):
+    from accounts.security import calibrate_argon2
+    result = calibrate_argon2(
+        target_ms=args.target_ms, memory_cost=args.memory_cost, parallelism=args.parallelism)
+    print(f"Median hash time: {result['elapsed_ms']} ms")
+    print(f"ARGON2_TIME_COST={result['time_cost']}")
+    print(f"ARGON2_MEMORY_COST={result['memory_cost']}")
+    print(f"ARGON2_PARALLELISM={result['parallelism']}")
+
+
+def rebuild_hospital_stats(args):
+    from server.settings import SessionLocal
+    from server.stats import rebuild_hospital_stats
+    with SessionLocal() as session:
+        count = rebuild_hospital_stats(session)
+    print(f"Rebuilt stats for {count} hospitals")
+
+
+def compact_change_log(args):
+    from server.settings import SessionLocal
+    from server.sync import compact_change_log
+    with SessionLocal() as session:
+        superseded, purged = compact_change_log(session, retention_days=args.retention_days)
+    print(f"Removed {superseded} superseded entries and {purged} expired tombstones")
+
+
 if __name__ == "__main__":
-    uvicorn.run("server.routers:app", port=8000, host="localhost", reload=True)
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command")
+
+    calibrate = commands.add_parser("calibrate-argon2", help="Pick Argon2 parameters for a target hash latency")
+    calibrate.add_argument("--target-ms", type=float, default=250)
+    calibrate.add_argument("--memory-cost", type=int, default=65536, help="KiB")
+    calibrate.add_argument("--parallelism", type=int, default=4)
+
+    commands.add_parser("rebuild-hospital-stats", help="Recompute hospital_stats from doctors and appointments")
+
+    compact = commands.add_parser("compact-change-log", help="Drop superseded change_log entries and old tombstones")
+    compact.add_argument("--retention-days", type=int, default=None)
+
+    args = parser.parse_args()
+    if args.command == "calibrate-argon2":
+        calibrate_argon2(args)
+    elif args.command == "rebuild-hospital-stats":
+        rebuild_hospital_stats(args)
+    elif args.command == "compact-change-log":
+        compact_change_log(args)
+    else:
+        uvicorn.run("server.routers:app", port=8000, host="localhost", reload=True)
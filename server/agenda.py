@@ -0,0 +1,102 @@
+import time
+from datetime import date
+
+from fastapi import HTTPException, Response
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from accounts.cache import TTLCache
+from accounts.models import Appointment, Doctor, Hospital, Patient
+from accounts.schemas import DayAgendaSchema
+from server.replicas import replica_set
+from server.settings import AGENDA_CACHE_SIZE, AGENDA_CACHE_TTL, READ_YOUR_WRITES_WINDOW, AsyncSessionLocal
+
+# Ҷадвали рӯзонаи духтур/беморхона барои экранҳои клиника.
+# Ҷавоби омода (JSON bytes) дар хотира аз рӯи (scope, id, date) нигоҳ дошта мешавад;
+# handler-ҳои қабул онро бекор мекунанд, TTL кӯҳнагиро дар дигар worker-ҳо маҳдуд мекунад.
+# Калиде, ки дар READ_YOUR_WRITES_WINDOW бекор шудааст, аз primary сохта мешавад,
+# то нусхаи replica-и ақибмонда барои тамоми AGENDA_CACHE_TTL дар кэш намонад.
+
+agenda_cache = TTLCache(maxsize=AGENDA_CACHE_SIZE, ttl=AGENDA_CACHE_TTL)
+recently_invalidated = TTLCache(maxsize=AGENDA_CACHE_SIZE, ttl=READ_YOUR_WRITES_WINDOW)
+_cleared_at = 0.0
+agenda_adapter = TypeAdapter(DayAgendaSchema)
+
+SCOPES = {
+    "doctor": (Doctor, Appointment.doctor_id, "Doctor not found"),
+    "hospital": (Hospital, Appointment.hospital_id, "Hospital not found"),
+}
+
+
+def agenda_keys(appointment: Appointment):
+    """Калидҳои кэш, ки қабул ба онҳо дохил мешавад; пеш аз тағйир ва баъди он гиред."""
+    return agenda_keys_for(appointment.doctor_id, appointment.hospital_id, appointment.appointment_date)
+
+
+def agenda_keys_for(doctor_id: int, hospital_id: int, day: date):
+    return [("doctor", doctor_id, day), ("hospital", hospital_id, day)]
+
+
+def invalidate_agenda(keys):
+    for key in keys:
+        agenda_cache.invalidate(key)
+        recently_invalidated.set(key, True)
+
+
+def clear_agenda():
+    # Барои тағйироте, ки ба номҳо дар ҳамаи agenda-ҳо дахл доранд (бемор, духтур)
+    global _cleared_at
+    agenda_cache.clear()
+    _cleared_at = time.time()
+
+
+def recently_changed(key) -> bool:
+    return recently_invalidated.get(key) is not None or _cleared_at > time.time() - READ_YOUR_WRITES_WINDOW
+
+
+async def get_day_agenda(db: AsyncSession, scope: str, owner_id: int, day: date) -> Response:
+    key = (scope, owner_id, day)
+    body = agenda_cache.get(key)
+    if body is None:
+        if replica_set.replicas and recently_changed(key):
+            async with AsyncSessionLocal() as primary:
+                body = await render_agenda(primary, scope, owner_id, day)
+        else:
+            body = await render_agenda(db, scope, owner_id, day)
+        agenda_cache.set(key, body)
+    return Response(content=body, media_type="application/json")
+
+
+async def render_agenda(db: AsyncSession, scope: str, owner_id: int, day: date) -> bytes:
+    model, column, not_found = SCOPES[scope]
+    if not await db.get(model, owner_id):
+        raise HTTPException(status_code=404, detail=not_found)
+    rows = (await db.execute(
+        select(
+            Appointment.id, Appointment.appointment_time, Appointment.status, Appointment.symptoms,
+            Appointment.patient_id, Patient.last_name, Patient.first_name, Patient.middle_name,
+            Appointment.doctor_id, Doctor.last_name, Doctor.first_name, Doctor.middle_name,
+        )
+        .join(Patient, Appointment.patient_id == Patient.id)
+        .join(Doctor, Appointment.doctor_id == Doctor.id)
+        .filter(column == owner_id, Appointment.appointment_date == day)
+        .order_by(Appointment.appointment_time, Appointment.id)
+    )).all()
+    agenda = {
+        "date": day,
+        "entries": [
+            {
+                "appointment_id": row[0],
+                "appointment_time": row[1],
+                "status": row[2],
+                "symptoms": row[3],
+                "patient_id": row[4],
+                "patient_name": " ".join(part for part in row[5:8] if part),
+                "doctor_id": row[8],
+                "doctor_name": " ".join(part for part in row[9:12] if part),
+            }
+            for row in rows
+        ],
+    }
+    return agenda_adapter.dump_json(agenda_adapter.validate_python(agenda))
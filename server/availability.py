@@ -0,0 +1,76 @@
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from accounts.models import Appointment, DoctorSchedule
+
+# Ин статусҳо слотро банд намекунанд
+FREE_SLOT_STATUSES = ("cancelled",)
+
+
+def expand_schedule(schedule: DoctorSchedule, day: date):
+    """Слотҳои ҷадвал дар рӯзи day: (оғоз, анҷом) ҳамчун datetime."""
+    duration = 30 if schedule.slot_duration is None else schedule.slot_duration
+    if duration <= 0:
+        raise ValueError(f"slot_duration must be positive, got {duration}")
+    start = datetime.combine(day, schedule.start_time)
+    end = datetime.combine(day, schedule.end_time)
+    step = timedelta(minutes=duration)
+    while start + step <= end:
+        yield start, start + step
+        start += step
+
+
+def overlaps_booking(booked_starts: list[datetime], slot_start: datetime, slot_end: datetime) -> bool:
+    # Қабул як слот давом мекунад; қабули ба сарҳад мувофиқнабуда ҳар слоти буридаашро банд мекунад
+    first = bisect_right(booked_starts, slot_start - (slot_end - slot_start))
+    return first < len(booked_starts) and booked_starts[first] < slot_end
+
+
+async def get_free_slots(db: AsyncSession, doctor_ids: list[int], date_from: date, date_to: date):
+    """Слотҳои озоди духтурон: як query барои ҷадвалҳо ва як query барои қабулҳо дар ҳамин давра."""
+    free_slots = {doctor_id: [] for doctor_id in doctor_ids}
+    if not doctor_ids:
+        return free_slots
+
+    schedules = (await db.scalars(
+        select(DoctorSchedule).filter(
+            DoctorSchedule.doctor_id.in_(doctor_ids),
+            DoctorSchedule.is_active == True)
+    )).all()
+    booked = defaultdict(list)
+    for doctor_id, appointment_date, appointment_time in (await db.execute(
+        select(Appointment.doctor_id, Appointment.appointment_date, Appointment.appointment_time).filter(
+            Appointment.doctor_id.in_(doctor_ids),
+            Appointment.appointment_date >= date_from,
+            Appointment.appointment_date <= date_to,
+            Appointment.status.not_in(FREE_SLOT_STATUSES))
+    )).all():
+        booked[(doctor_id, appointment_date)].append(datetime.combine(appointment_date, appointment_time))
+    for starts in booked.values():
+        starts.sort()
+
+    # day_of_week мисли date.weekday(): 0 - душанбе, 6 - якшанбе
+    schedules_by_weekday = defaultdict(list)
+    for schedule in schedules:
+        schedules_by_weekday[schedule.day_of_week].append(schedule)
+
+    day = date_from
+    while day <= date_to:
+        for schedule in schedules_by_weekday.get(day.weekday(), []):
+            booked_starts = booked.get((schedule.doctor_id, day), [])
+            for start, end in expand_schedule(schedule, day):
+                if not overlaps_booking(booked_starts, start, end):
+                    free_slots[schedule.doctor_id].append({
+                        "date": day,
+                        "start_time": start.time(),
+                        "end_time": end.time(),
+                    })
+        day += timedelta(days=1)
+
+    for slots in free_slots.values():
+        slots.sort(key=lambda slot: (slot["date"], slot["start_time"]))
+    return free_slots
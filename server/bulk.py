@@ -0,0 +1,204 @@
+import json
+from collections import Counter, defaultdict
+
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from accounts.models import Appointment, Doctor
+from accounts.schemas import AppointmentCreateSchema
+from server.models import dialect_insert
+from server.settings import BULK_CHUNK_SIZE, BULK_MAX_ROWS
+from server import stats
+from server.agenda import agenda_keys_for, invalidate_agenda
+from server.events import publish_appointment_event
+from server.sync import log_changes
+
+
+async def read_bulk_rows(request: Request):
+    """Массиви JSON ё NDJSON (application/x-ndjson) -> рӯйхати (сатр, хато)."""
+    body = await request.body()
+    if "ndjson" in request.headers.get("content-type", ""):
+        rows = []
+        for line in body.decode().splitlines():
+            if not line.strip():
+                continue
+            try:
+                rows.append((json.loads(line), None))
+            except ValueError as error:
+                rows.append((None, f"Invalid JSON: {error}"))
+    else:
+        try:
+            payload = json.loads(body or b"[]")
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {error}")
+        if not isinstance(payload, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array")
+        rows = [(row, None) for row in payload]
+    if len(rows) > BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ROWS} rows per request")
+    return rows
+
+
+def validate_rows(rows, schema):
+    results = [None] * len(rows)
+    valid = []
+    for index, (row, error) in enumerate(rows):
+        if error is not None:
+            results[index] = {"index": index, "status": "error", "errors": [error]}
+            continue
+        try:
+            valid.append((index, schema.model_validate(row).model_dump()))
+        except ValidationError as error:
+            results[index] = {
+                "index": index,
+                "status": "error",
+                "errors": [f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors()],
+            }
+    return results, valid
+
+
+def _dedupe(valid, key_column):
+    # Дар як chunk ON CONFLICT як сатрро ду бор иваз карда наметавонад; охиринаш мемонад
+    last_by_key = {data[key_column]: index for index, data in valid}
+    kept, duplicates = [], []
+    for index, data in valid:
+        (kept if last_by_key[data[key_column]] == index else duplicates).append((index, data))
+    return kept, duplicates
+
+
+def _summary(results):
+    counts = Counter(result["status"] for result in results)
+    return {
+        "created": counts["created"],
+        "updated": counts["updated"],
+        "skipped": counts["skipped"],
+        "failed": counts["error"],
+        "results": results,
+    }
+
+
+async def bulk_upsert(db: AsyncSession, rows, model, schema, key_column: str, on_conflict: str):
+    """Upsert аз рӯи калиди unique (passport_number/license_number) бо chunk-ҳои алоҳида.
+
+    created/updated аз худи навишт муайян мешавад, на аз SELECT-и пешакӣ: INSERT ... ON CONFLICT
+    DO NOTHING RETURNING сатрҳои навро медиҳад, боқимонда (калидҳои мавҷуда) бо FOR UPDATE
+    қулф шуда, нав карда мешаванд - hospital_id-и пешинаи духтур зери ҳамон қулф хонда мешавад.
+    """
+    results, valid = validate_rows(rows, schema)
+    table = model.__table__
+    key = table.c[key_column]
+    dialect_name = (await db.connection()).dialect.name
+    update_columns = [column.name for column in table.columns if column.name in schema.model_fields and column.name != key_column]
+    update_stmt = (
+        update(table)
+        .where(key == bindparam("_key"))
+        .values({**{name: bindparam(f"_{name}") for name in update_columns}, "version": table.c.version + 1})
+    )
+
+    for start in range(0, len(valid), BULK_CHUNK_SIZE):
+        chunk, duplicates = _dedupe(valid[start:start + BULK_CHUNK_SIZE], key_column)
+        for index, data in duplicates:
+            results[index] = {"index": index, "status": "error", "errors": [f"Duplicate {key_column} in request"]}
+        if not chunk:
+            continue
+
+        try:
+            insert_stmt = dialect_insert(dialect_name, table).on_conflict_do_nothing(index_elements=[key_column])
+            inserted = await db.execute(insert_stmt.returning(table.c.id, key), [data for _, data in chunk])
+            created = {row[1]: row[0] for row in inserted.all()}
+            conflicting = [(index, data) for index, data in chunk if data[key_column] not in created]
+
+            existing = {}
+            if conflicting:
+                columns = [key, table.c.id] + ([table.c.hospital_id] if model is Doctor else [])
+                stmt = select(*columns).filter(key.in_([data[key_column] for _, data in conflicting]))
+                if on_conflict == "update":
+                    stmt = stmt.with_for_update()
+                existing = {row[0]: row for row in (await db.execute(stmt)).all()}
+
+            doctor_deltas = Counter()
+            to_update = []
+            for index, data in chunk:
+                row_key = data[key_column]
+                if row_key in created:
+                    results[index] = {"index": index, "status": "created", "id": created[row_key]}
+                    if model is Doctor:
+                        doctor_deltas[data.get("hospital_id")] += 1
+                elif row_key not in existing:
+                    results[index] = {"index": index, "status": "error", "errors": ["Row was deleted concurrently, retry"]}
+                elif on_conflict != "update":
+                    results[index] = {"index": index, "status": "skipped", "id": existing[row_key][1]}
+                else:
+                    results[index] = {"index": index, "status": "updated", "id": existing[row_key][1]}
+                    to_update.append({"_key": row_key, **{f"_{name}": data.get(name) for name in update_columns}})
+                    if model is Doctor and existing[row_key][2] != data.get("hospital_id"):
+                        doctor_deltas[existing[row_key][2]] -= 1
+                        doctor_deltas[data.get("hospital_id")] += 1
+            if to_update:
+                await db.execute(update_stmt, to_update)
+
+            if doctor_deltas:
+                await db.run_sync(lambda session: stats.apply_deltas(session.connection(), doctor_deltas, Counter()))
+            changed_ids = list(created.values()) + [existing[row["_key"]][1] for row in to_update]
+            await log_changes(db, table.name, changed_ids)
+            await db.commit()
+        except DBAPIError as error:
+            await db.rollback()
+            for index, _ in chunk:
+                results[index] = {"index": index, "status": "error", "errors": [str(error.orig)]}
+
+    return _summary(results)
+
+
+APPOINTMENT_ROW_COLUMNS = ("patient_id", "doctor_id", "hospital_id", "appointment_date", "appointment_time", "status")
+
+
+async def bulk_create_appointments(db: AsyncSession, rows):
+    """Қабулҳо калиди табиӣ надоранд: слоти банд (uq_appointments_doctor_slot) 'skipped' мешавад."""
+    results, valid = validate_rows(rows, AppointmentCreateSchema)
+    for _, data in valid:
+        data["status"] = data["status"] or "scheduled"
+    table = Appointment.__table__
+    dialect_name = (await db.connection()).dialect.name
+
+    for start in range(0, len(valid), BULK_CHUNK_SIZE):
+        chunk = valid[start:start + BULK_CHUNK_SIZE]
+        stmt = dialect_insert(dialect_name, table).on_conflict_do_nothing().returning(
+            table.c.id, *(table.c[column] for column in APPOINTMENT_ROW_COLUMNS))
+        try:
+            # Калид ҳамаи сутунҳои қабулро дар бар мегирад: бекоршудаҳо аз unique index берунанд,
+            # бинобар ин як слот метавонад якчанд сатри воқеан илованамударо баргардонад
+            inserted = (await db.execute(stmt, [data for _, data in chunk])).all()
+            returned = defaultdict(list)
+            for row in inserted:
+                returned[tuple(row[1:])].append(row[0])
+            for index, data in chunk:
+                ids = returned.get(tuple(data[column] for column in APPOINTMENT_ROW_COLUMNS))
+                if ids:
+                    results[index] = {"index": index, "status": "created", "id": ids.pop(0)}
+                else:
+                    results[index] = {"index": index, "status": "skipped", "errors": ["This time slot is already booked for the doctor"]}
+
+            # Statistics, change_log ва event-ҳо танҳо аз сатрҳое, ки база баргардонд
+            created = [{"id": row[0], **dict(zip(APPOINTMENT_ROW_COLUMNS, row[1:]))} for row in inserted]
+            appointment_deltas = Counter(
+                (appointment["hospital_id"], appointment["appointment_date"], appointment["status"]) for appointment in created)
+            agenda_keys = set()
+            for appointment in created:
+                agenda_keys.update(agenda_keys_for(appointment["doctor_id"], appointment["hospital_id"], appointment["appointment_date"]))
+            if appointment_deltas:
+                await db.run_sync(lambda session: stats.apply_deltas(session.connection(), Counter(), appointment_deltas))
+            await log_changes(db, table.name, [appointment["id"] for appointment in created])
+            await db.commit()
+            invalidate_agenda(agenda_keys)
+            for appointment in created:
+                await publish_appointment_event("created", appointment)
+        except DBAPIError as error:
+            await db.rollback()
+            for index, _ in chunk:
+                results[index] = {"index": index, "status": "error", "errors": [str(error.orig)]}
+
+    return _summary(results)
@@ -0,0 +1,150 @@
+import asyncio
+import itertools
+import json
+from abc import ABC, abstractmethod
+from datetime import date, datetime, time
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from server.settings import EVENT_HEARTBEAT_INTERVAL, EVENT_QUEUE_SIZE
+
+# Огоҳиҳо дар бораи тағйири қабулҳо барои dashboard-ҳо (SSE).
+# Handler-ҳо рӯйдодро ба broker мефиристанд; broker онро ба EventBus-и ҳар
+# worker мерасонад, ва bus ба обуначиёни мувофиқ (аз рӯи hospital/doctor) тақсим мекунад.
+# Backpressure: ҳар обуначӣ навбати маҳдуд дорад; агар пур шавад, stream бо
+# рӯйдоди "overflow" баста мешавад ва client бояд аз нав пайваст шуда, GET кунад.
+
+
+class Subscriber:
+    def __init__(self, hospital_id: int = None, doctor_id: int = None):
+        self.hospital_id = hospital_id
+        self.doctor_id = doctor_id
+        self.queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+        self.overflowed = False
+
+    def matches(self, event: dict) -> bool:
+        if self.hospital_id is not None and self.hospital_id not in event["hospital_ids"]:
+            return False
+        if self.doctor_id is not None and self.doctor_id not in event["doctor_ids"]:
+            return False
+        return True
+
+
+class EventBus:
+    """Pub/sub дар дохили process."""
+
+    def __init__(self):
+        self.subscribers = set()
+
+    def subscribe(self, hospital_id: int = None, doctor_id: int = None) -> Subscriber:
+        subscriber = Subscriber(hospital_id, doctor_id)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    def dispatch(self, event: dict):
+        for subscriber in list(self.subscribers):
+            if subscriber.overflowed or not subscriber.matches(event):
+                continue
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                subscriber.overflowed = True
+
+
+class Broker(ABC):
+    """Интерфейси интиқол байни worker-ҳо (масалан Redis pub/sub ё PostgreSQL LISTEN/NOTIFY).
+
+    publish() рӯйдодро ба ҳама worker-ҳо мефиристад; ҳар worker онро ба bus.dispatch() медиҳад.
+    """
+
+    @abstractmethod
+    async def publish(self, event: dict):
+        ...
+
+    async def start(self, bus: EventBus):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class InProcessBroker(Broker):
+    # Барои як worker: рӯйдод фавран ба bus-и худи ҳамин process меравад
+    def __init__(self):
+        self.bus = None
+
+    async def start(self, bus: EventBus):
+        self.bus = bus
+
+    async def publish(self, event: dict):
+        if self.bus is not None:
+            self.bus.dispatch(event)
+
+
+event_bus = EventBus()
+broker: Broker = InProcessBroker()
+_sequence = itertools.count(1)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+async def publish_appointment_event(event_type: str, appointment: dict, previous: dict = None):
+    """event_type: created | updated | deleted; previous - қиматҳои пеш аз update."""
+    sources = [appointment] + ([previous] if previous else [])
+    await broker.publish({
+        "type": f"appointment.{event_type}",
+        "appointment": appointment,
+        "hospital_ids": sorted({source["hospital_id"] for source in sources}),
+        "doctor_ids": sorted({source["doctor_id"] for source in sources}),
+    })
+
+
+def appointment_payload(appointment) -> dict:
+    return {
+        "id": appointment.id,
+        "patient_id": appointment.patient_id,
+        "doctor_id": appointment.doctor_id,
+        "hospital_id": appointment.hospital_id,
+        "appointment_date": appointment.appointment_date,
+        "appointment_time": appointment.appointment_time,
+        "status": appointment.status,
+    }
+
+
+def _sse(event_type: str, data: dict) -> str:
+    return f"id: {next(_sequence)}\nevent: {event_type}\ndata: {json.dumps(data, default=_json_default)}\n\n"
+
+
+async def _event_stream(request: Request, subscriber: Subscriber):
+    try:
+        yield "retry: 3000\n\n"
+        while not await request.is_disconnected():
+            if subscriber.overflowed:
+                yield _sse("overflow", {"detail": "Subscriber is too slow, reconnect and refetch"})
+                return
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), timeout=EVENT_HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                # Comment-и SSE пайвастро аз proxy-ҳо зинда нигоҳ медорад
+                yield ": ping\n\n"
+                continue
+            yield _sse(event["type"], event)
+    finally:
+        event_bus.unsubscribe(subscriber)
+
+
+def event_stream_response(request: Request, hospital_id: int = None, doctor_id: int = None):
+    subscriber = event_bus.subscribe(hospital_id, doctor_id)
+    return StreamingResponse(
+        _event_stream(request, subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
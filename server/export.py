@@ -0,0 +1,54 @@
+import csv
+import io
+import json
+from datetime import date, datetime, time
+from typing import Literal
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from server.settings import EXPORT_BATCH_SIZE
+
+# Export-и пурраи ҷадвалҳо: сатрҳо бо server-side cursor (yield_per) хонда шуда,
+# ҳар partition фавран ба client фиристода мешавад, бинобар ин хотира аз андозаи
+# ҷадвал вобаста нест.
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+def _ndjson_chunk(columns, rows):
+    return "".join(json.dumps(dict(zip(columns, row)), default=_json_default, ensure_ascii=False) + "\n" for row in rows)
+
+
+def _csv_chunk(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        [value.isoformat() if isinstance(value, (datetime, date, time)) else value for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+async def _stream_rows(session_factory, stmt, export_format: str):
+    # Сессияи худро мекушоем: dependency-и get_db то охири stream зинда намемонад
+    async with session_factory() as db:
+        result = await db.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        columns = list(result.keys())
+        if export_format == "csv":
+            yield _csv_chunk([columns])
+        async for rows in result.partitions():
+            yield _ndjson_chunk(columns, rows) if export_format == "ndjson" else _csv_chunk(rows)
+
+
+def export_response(session_factory, model, filters, export_format: Literal["ndjson", "csv"], filename: str):
+    """Сутунҳои ҷадвали model-ро бо филтрҳо ҳамчун NDJSON ё CSV stream мекунад."""
+    stmt = filters.apply(select(*model.__table__.columns)).order_by(model.id)
+    return StreamingResponse(
+        _stream_rows(session_factory, stmt, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
@@ -0,0 +1,79 @@
+from datetime import date
+from typing import Optional
+
+from fastapi import Query
+
+from accounts.models import Appointment, MedicalRecord, Patient
+
+# Филтрҳои умумӣ барои list ва export endpoint-ҳо, то ки query яксон сохта шавад
+
+
+class PatientFilters:
+    def __init__(
+        self,
+        region: Optional[str] = Query(None),
+        gender: Optional[str] = Query(None),
+        blood_type: Optional[str] = Query(None),
+    ):
+        self.region = region
+        self.gender = gender
+        self.blood_type = blood_type
+
+    def apply(self, stmt):
+        if self.region is not None:
+            stmt = stmt.filter(Patient.region == self.region)
+        if self.gender is not None:
+            stmt = stmt.filter(Patient.gender == self.gender)
+        if self.blood_type is not None:
+            stmt = stmt.filter(Patient.blood_type == self.blood_type)
+        return stmt
+
+
+class AppointmentFilters:
+    def __init__(
+        self,
+        patient_id: Optional[int] = Query(None),
+        doctor_id: Optional[int] = Query(None),
+        hospital_id: Optional[int] = Query(None),
+        status: Optional[str] = Query(None),
+        date_from: Optional[date] = Query(None),
+        date_to: Optional[date] = Query(None),
+    ):
+        self.patient_id = patient_id
+        self.doctor_id = doctor_id
+        self.hospital_id = hospital_id
+        self.status = status
+        self.date_from = date_from
+        self.date_to = date_to
+
+    def apply(self, stmt):
+        if self.patient_id is not None:
+            stmt = stmt.filter(Appointment.patient_id == self.patient_id)
+        if self.doctor_id is not None:
+            stmt = stmt.filter(Appointment.doctor_id == self.doctor_id)
+        if self.hospital_id is not None:
+            stmt = stmt.filter(Appointment.hospital_id == self.hospital_id)
+        if self.status is not None:
+            stmt = stmt.filter(Appointment.status == self.status)
+        if self.date_from is not None:
+            stmt = stmt.filter(Appointment.appointment_date >= self.date_from)
+        if self.date_to is not None:
+            stmt = stmt.filter(Appointment.appointment_date <= self.date_to)
+        return stmt
+
+
+class MedicalRecordFilters:
+    def __init__(
+        self,
+        patient_id: Optional[int] = Query(None),
+        doctor_id: Optional[int] = Query(None),
+    ):
+        self.patient_id = patient_id
+        self.doctor_id = doctor_id
+
+    def apply(self, stmt):
+        if self.patient_id is not None:
+            stmt = stmt.filter(MedicalRecord.patient_id == self.patient_id)
+        if self.doctor_id is not None:
+            stmt = stmt.filter(MedicalRecord.doctor_id == self.doctor_id)
+        return stmt
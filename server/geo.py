@@ -0,0 +1,63 @@
+import math
+
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from accounts.models import Doctor, Hospital
+from server.loaders import HOSPITAL_PROFILE
+
+# Ҷустуҷӯи беморхонаҳои наздик: аввал bounding box аз рӯи индекси
+# ix_hospitals_lat_lon (танҳо номзадҳои дохили квадрат аз база меоянд),
+# баъд масофаи дақиқ бо haversine ва тартиб дар Python.
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat: float, lon: float, radius_km: float):
+    """(min_lat, max_lat, min_lon, max_lon); min_lon/max_lon None мешаванд, агар квадрат қутб ё 180° -ро бурад."""
+    d_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = lat - d_lat, lat + d_lat
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), min(max_lat, 90.0), None, None
+    d_lon = math.degrees(math.asin(math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(lat))))
+    min_lon, max_lon = lon - d_lon, lon + d_lon
+    if min_lon < -180 or max_lon > 180:
+        return min_lat, max_lat, None, None
+    return min_lat, max_lat, min_lon, max_lon
+
+
+async def find_nearby_hospitals(
+    db: AsyncSession, lat: float, lon: float, radius_km: float, specialization: str = None, limit: int = 20,
+):
+    """Беморхонаҳои фаъол дар радиуси radius_km, аз наздиктарин: рӯйхати (hospital, distance_km)."""
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+    stmt = select(Hospital).options(*HOSPITAL_PROFILE).filter(
+        Hospital.is_active.is_(True),
+        Hospital.latitude.between(min_lat, max_lat),
+        Hospital.longitude.is_not(None),
+    )
+    if min_lon is not None:
+        stmt = stmt.filter(Hospital.longitude.between(min_lon, max_lon))
+    if specialization is not None:
+        stmt = stmt.filter(exists().where(
+            Doctor.hospital_id == Hospital.id,
+            Doctor.specialization == specialization,
+            Doctor.is_available.is_(True),
+        ))
+
+    candidates = (await db.scalars(stmt)).all()
+    ranked = []
+    for hospital in candidates:
+        distance = haversine_km(lat, lon, hospital.latitude, hospital.longitude)
+        if distance <= radius_km:
+            ranked.append((hospital, distance))
+    ranked.sort(key=lambda item: item[1])
+    return ranked[:limit]
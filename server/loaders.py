@@ -0,0 +1,31 @@
+from sqlalchemy.orm import joinedload, selectinload, undefer
+
+from accounts.models import Appointment, Department, Doctor, Hospital, MedicalRecord, Patient
+
+# Loader profile-ҳо: ҳар кадом майдонҳои ҳосилшудаи schema-ро барои тамоми
+# саҳифа бо шумораи собити query-ҳо пур мекунад (бе lazy load барои ҳар сатр)
+
+HOSPITAL_PROFILE = [
+    undefer(Hospital.doctor_count),
+]
+
+DOCTOR_PROFILE = [
+    joinedload(Doctor.hospital).load_only(Hospital.name),
+    joinedload(Doctor.department).load_only(Department.name),
+]
+
+APPOINTMENT_PROFILE = [
+    joinedload(Appointment.patient).load_only(Patient.first_name, Patient.last_name, Patient.middle_name),
+    joinedload(Appointment.doctor).load_only(Doctor.first_name, Doctor.last_name, Doctor.middle_name),
+    joinedload(Appointment.hospital).load_only(Hospital.name),
+]
+
+MEDICAL_RECORD_PROFILE = [
+    selectinload(MedicalRecord.prescriptions),
+]
+
+# Барои db.refresh() баъди create/update
+HOSPITAL_REFRESH = ["doctor_count"]
+DOCTOR_REFRESH = ["hospital", "department"]
+APPOINTMENT_REFRESH = ["patient", "doctor", "hospital"]
+MEDICAL_RECORD_REFRESH = ["prescriptions"]
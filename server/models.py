@@ -1,5 +1,22 @@
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import DeclarativeBase
 
 
 class BaseModel(DeclarativeBase):
-    pass
\ No newline at end of file
+    pass
+
+
+def dialect_insert(dialect_name: str, table):
+    # INSERT ... ON CONFLICT дар SQLite ва PostgreSQL як хел навишта мешавад
+    if dialect_name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+def is_unique_violation(error) -> bool:
+    """IntegrityError аз unique index/constraint (на NOT NULL ё foreign key)."""
+    orig = error.orig
+    if getattr(orig, "sqlite_errorname", None) == "SQLITE_CONSTRAINT_UNIQUE":
+        return True
+    # asyncpg/psycopg SQLSTATE-ро дар sqlstate ё pgcode медиҳанд
+    return (getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)) == "23505" or "UNIQUE constraint failed" in str(orig)
@@ -0,0 +1,90 @@
+import base64
+import json
+from datetime import date, datetime, time
+from typing import Optional
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from server.settings import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+
+
+class PageParams:
+    # Параметрҳои умумии саҳифабандӣ барои ҳамаи list endpoint-ҳо
+    def __init__(
+        self,
+        limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+        cursor: Optional[str] = Query(None),
+        sort: str = Query("id", description="Field name, prefix with '-' for descending order"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.sort = sort
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return value
+
+
+def _decode_value(value, column):
+    python_type = column.type.python_type
+    if value is not None and python_type in (datetime, date, time):
+        return python_type.fromisoformat(value)
+    return value
+
+
+def encode_cursor(value, row_id: int) -> str:
+    raw = json.dumps([_encode_value(value), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str, column):
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return _decode_value(value, column), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def keyset_statement(stmt, model, params: PageParams, sort_fields: list[str]):
+    """Ба stmt шарти cursor, ORDER BY ва LIMIT-и саҳифаро илова мекунад."""
+    descending = params.sort.startswith("-")
+    field = params.sort.lstrip("-")
+    if field not in sort_fields:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Sorting by '{field}' is not allowed. Allowed: {', '.join(sort_fields)}")
+
+    column = getattr(model, field)
+    pk = model.id
+
+    if params.cursor:
+        value, last_id = decode_cursor(params.cursor, column)
+        if field == "id":
+            condition = pk < last_id if descending else pk > last_id
+        else:
+            # (field, id) > (value, last_id): index-и (field, id) мустақиман ба cursor меравад
+            key, bound = tuple_(column, pk), tuple_(value, last_id)
+            condition = key < bound if descending else key > bound
+        stmt = stmt.filter(condition)
+
+    order_by = (pk,) if field == "id" else (column, pk)
+    stmt = stmt.order_by(*[col.desc() if descending else col.asc() for col in order_by])
+
+    return stmt.limit(params.limit + 1)
+
+
+async def paginate(db: AsyncSession, stmt, model, params: PageParams, sort_fields: list[str]):
+    """Keyset pagination: саҳифаи N ҳамон қадар арзон аст, ки саҳифаи 1."""
+    field = params.sort.lstrip("-")
+    rows = (await db.scalars(keyset_statement(stmt, model, params, sort_fields))).all()
+    next_cursor = None
+    if len(rows) > params.limit:
+        rows = rows[:params.limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, field), last.id)
+
+    return {"items": rows, "next_cursor": next_cursor}
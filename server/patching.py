@@ -0,0 +1,82 @@
+from typing import Optional
+
+from fastapi import Header, HTTPException, status
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from accounts.models import Appointment, Doctor
+from server.models import is_unique_violation
+from server.sync import log_changes
+
+# PATCH: танҳо майдонҳои фиристодашуда бо як UPDATE ... RETURNING навишта мешаванд,
+# версия дар худи ҳамон statement тафтиш ва зиёд мешавад (If-Match).
+# Агар майдоне тағйир ёбад, ки hook-ҳои after_flush (hospital_stats, agenda) қимати
+# пешинаашро лозим доранд, роҳи ORM (get + flush) истифода мешавад.
+
+ORM_PATH_FIELDS = {
+    Doctor: {"hospital_id"},
+    Appointment: {"hospital_id", "doctor_id", "appointment_date", "status"},
+}
+
+
+def expected_version(if_match: Optional[str] = Header(None, description="ETag from GET/PATCH of the resource")):
+    # ETag "<version>" ё "<version>-<digest>" (hospitals/doctors, ниг. versioned_etag)
+    if if_match is None or if_match.strip() == "*":
+        return None
+    try:
+        return int(if_match.strip().removeprefix("W/").strip('"').split("-", 1)[0])
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="If-Match must be a resource version")
+
+
+async def _raise_missing_or_stale(db: AsyncSession, model, object_id: int, not_found: str):
+    current = await db.get(model, object_id)
+    if current is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found)
+    raise HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail=f"Version mismatch, current version is {current.version}",
+    )
+
+
+async def patch_object(
+    db: AsyncSession, model, object_id: int, changes: dict, version: Optional[int],
+    not_found: str, conflict_detail: str = "Conflicts with an existing record",
+):
+    """Тағйироти қисмӣ; (объект, қиматҳои пешина ё None) бармегардонад. 404, 409 ё 412 медиҳад."""
+    if not changes:
+        obj = await db.get(model, object_id)
+        if obj is None or (version is not None and obj.version != version):
+            await _raise_missing_or_stale(db, model, object_id, not_found)
+        return obj, None
+
+    try:
+        if changes.keys() & ORM_PATH_FIELDS.get(model, set()):
+            obj = await db.get(model, object_id)
+            if obj is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found)
+            if version is not None and obj.version != version:
+                await _raise_missing_or_stale(db, model, object_id, not_found)
+            previous = {column.key: getattr(obj, column.key) for column in model.__table__.columns}
+            for key, value in changes.items():
+                setattr(obj, key, value)
+            await db.commit()
+            return obj, previous
+
+        stmt = update(model).filter(model.id == object_id).values(**changes, version=model.version + 1)
+        if version is not None:
+            stmt = stmt.filter(model.version == version)
+        obj = (await db.scalars(
+            stmt.returning(model), execution_options={"synchronize_session": False})).one_or_none()
+        if obj is None:
+            await db.rollback()
+            await _raise_missing_or_stale(db, model, object_id, not_found)
+        await log_changes(db, model.__tablename__, [object_id])
+        await db.commit()
+        return obj, None
+    except IntegrityError as error:
+        await db.rollback()
+        if is_unique_violation(error):
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=conflict_detail)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Update violates a database constraint")
@@ -0,0 +1,102 @@
+import asyncio
+import hashlib
+import itertools
+import time
+
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from accounts.cache import TTLCache
+from server.settings import (
+    AsyncSessionLocal, READ_REPLICA_URLS, READ_YOUR_WRITES_WINDOW, REPLICA_HEALTH_INTERVAL,
+    create_database_engine, get_async_database_url,
+)
+
+# Хониш аз replica-ҳо (round-robin байни солимҳо), навишт ҳамеша ба primary.
+# Клиенте, ки ҳозир POST/PUT/DELETE кардааст, то READ_YOUR_WRITES_WINDOW сония
+# аз primary мехонад, то тағйири худро бубинад (lag-и replica).
+
+STICKY_COOKIE = "read_primary_until"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = url
+        self.engine = create_database_engine(get_async_database_url(url), is_async=True)
+        self.session_factory = async_sessionmaker(
+            bind=self.engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+        self.healthy = True
+
+
+class ReplicaSet:
+    def __init__(self, urls):
+        self.replicas = [Replica(url) for url in urls]
+        self._counter = itertools.count()
+
+    def session_factory(self):
+        # Round-robin байни replica-ҳои солим; агар ҳеҷ кадом набошад, primary
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return AsyncSessionLocal
+        return healthy[next(self._counter) % len(healthy)].session_factory
+
+    async def check_health(self):
+        for replica in self.replicas:
+            try:
+                async with replica.engine.connect() as connection:
+                    await connection.execute(text("SELECT 1"))
+                replica.healthy = True
+            except Exception as error:
+                if replica.healthy:
+                    print(f"Read replica {replica.engine.url!r} is unavailable: {error}")
+                replica.healthy = False
+
+    async def dispose(self):
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+replica_set = ReplicaSet(READ_REPLICA_URLS)
+
+# Калиди клиент -> вақти охирини навишт (дар дохили ҳамин process)
+recent_writers = TTLCache(maxsize=100000, ttl=READ_YOUR_WRITES_WINDOW)
+
+
+def _client_key(request: Request) -> str:
+    identity = request.headers.get("authorization") or (request.client.host if request.client else "")
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+
+def remember_write(request: Request, response):
+    """Баъди навишти бомуваффақият клиентро ба primary мечаспонад (кэш + cookie барои дигар worker-ҳо)."""
+    if request.method not in WRITE_METHODS or response.status_code >= 400 or not replica_set.replicas:
+        return
+    until = time.time() + READ_YOUR_WRITES_WINDOW
+    recent_writers.set(_client_key(request), until)
+    response.set_cookie(STICKY_COOKIE, str(int(until) + 1), max_age=READ_YOUR_WRITES_WINDOW, httponly=True)
+
+
+def reads_from_primary(request: Request) -> bool:
+    if not replica_set.replicas or recent_writers.get(_client_key(request)) is not None:
+        return True
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def read_session_factory(request: Request):
+    return AsyncSessionLocal if reads_from_primary(request) else replica_set.session_factory()
+
+
+async def get_read_db(request: Request):
+    async with read_session_factory(request)() as db:
+        yield db
+
+
+async def replica_health_checker():
+    while True:
+        await replica_set.check_health()
+        await asyncio.sleep(REPLICA_HEALTH_INTERVAL)
@@ -0,0 +1,158 @@
+import functools
+import hashlib
+import json
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from accounts.cache import TTLCache
+from server.replicas import replica_set
+from server.settings import AsyncSessionLocal, READ_YOUR_WRITES_WINDOW, RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL
+
+# Кэши ҷавобҳо барои маълумоти маълумотномавӣ (hospitals, doctors).
+# Ҳар ресурс версия дорад, ки handler-ҳои POST/PUT/DELETE онро зиёд мекунанд.
+# ETag аз версияҳо ва URL ҳисоб мешавад, пас If-None-Match бе база 304 медиҳад.
+# Бо backend-и дохили process (shared = False) worker-и дигар bump-ро намебинад, бинобар ин
+# ба ETag рақами давраи RESPONSE_CACHE_TTL илова мешавад: ҳам ҷисми кэш ва ҳам 304 дар
+# ин worker-ҳо ҳадди аксар то RESPONSE_CACHE_TTL сония кӯҳна мемонанд.
+
+
+class ResponseCacheBackend(ABC):
+    """Интерфейси нигаҳдорӣ: ҷисми ҷавобҳо ва ҳисобкунакҳои версия (масалан Redis барои чанд worker)."""
+
+    # True, агар ҳисобкунакҳо байни ҳамаи worker-ҳо умумӣ бошанд
+    shared = False
+
+    @abstractmethod
+    def get(self, key: str):
+        ...
+
+    @abstractmethod
+    def set(self, key: str, body: bytes):
+        ...
+
+    @abstractmethod
+    def get_version(self, resource: str) -> int:
+        ...
+
+    @abstractmethod
+    def bump_version(self, resource: str) -> int:
+        ...
+
+    @abstractmethod
+    def last_bump(self, resource: str) -> float:
+        """Вақти охирин bump (time.time()), 0 агар набошад."""
+
+
+class InMemoryBackend(ResponseCacheBackend):
+    # Танҳо дар дохили як process
+    def __init__(self, maxsize: int, ttl: float):
+        self._bodies = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._versions = {}
+        self._bumped_at = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        return self._bodies.get(key)
+
+    def set(self, key: str, body: bytes):
+        self._bodies.set(key, body)
+
+    def get_version(self, resource: str) -> int:
+        return self._versions.get(resource, 0)
+
+    def bump_version(self, resource: str) -> int:
+        with self._lock:
+            self._versions[resource] = self._versions.get(resource, 0) + 1
+            self._bumped_at[resource] = time.time()
+            return self._versions[resource]
+
+    def last_bump(self, resource: str) -> float:
+        return self._bumped_at.get(resource, 0)
+
+
+class ResponseCache:
+    def __init__(self, backend: ResponseCacheBackend):
+        self.backend = backend
+        # Баъди restart ҳисобкунакҳо аз 0 сар мешаванд; epoch ETag-ҳои кӯҳнаро бекор мекунад
+        self.epoch = uuid.uuid4().hex
+
+    def bump(self, *resources: str):
+        for resource in resources:
+            self.backend.bump_version(resource)
+
+    def recently_bumped(self, resources) -> bool:
+        # Replica метавонад то READ_YOUR_WRITES_WINDOW сония аз primary ақиб монад
+        since = time.time() - READ_YOUR_WRITES_WINDOW
+        return any(self.backend.last_bump(resource) > since for resource in resources)
+
+    def etag(self, request: Request, resources) -> str:
+        versions = ",".join(f"{resource}:{self.backend.get_version(resource)}" for resource in resources)
+        query = "&".join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items()))
+        period = "" if self.backend.shared else int(time.time() // RESPONSE_CACHE_TTL)
+        digest = hashlib.sha256(f"{self.epoch}|{period}|{versions}|{request.url.path}?{query}".encode()).hexdigest()
+        return f'"{digest[:32]}"'
+
+
+response_cache = ResponseCache(InMemoryBackend(maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL))
+
+
+def versioned_etag(version: int, etag: str) -> str:
+    """ETag-и як объект: "<version>-<digest>"; PATCH аз If-Match танҳо version-ро мегирад."""
+    return f'"{version}-{etag.strip(chr(34))}"'
+
+
+def _digest_part(tag: str) -> str:
+    value = tag.strip('"')
+    return f'"{value.split("-", 1)[1]}"' if "-" in value else f'"{value}"'
+
+
+def _matching_etag(if_none_match: str, etag: str, versioned: bool):
+    if not if_none_match:
+        return None
+    for candidate in (value.strip().removeprefix("W/") for value in if_none_match.split(",")):
+        if candidate == "*" or (_digest_part(candidate) if versioned else candidate) == etag:
+            return candidate
+    return None
+
+
+def cached_response(response_model, *resources: str, versioned: bool = False):
+    """Декоратор барои GET handler-е, ки `request: Request` дорад; ҷавоб аз версияҳои resources вобаста аст.
+
+    versioned=True барои як объект: ETag версияи сатрро дар бар мегирад (versioned_etag).
+    """
+    adapter = TypeAdapter(response_model)
+
+    def decorator(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            request = kwargs["request"]
+            etag = response_cache.etag(request, resources)
+            headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+            matched = _matching_etag(request.headers.get("if-none-match"), etag, versioned)
+            if matched:
+                if versioned and matched != "*":
+                    headers["ETag"] = matched
+                return Response(status_code=304, headers=headers)
+            body = response_cache.backend.get(etag)
+            if body is None:
+                if replica_set.replicas and response_cache.recently_bumped(resources):
+                    # Ҷисми нав зери ETag-и нав аз primary хонда мешавад, на аз replica-и ақибмонда
+                    async with AsyncSessionLocal() as db:
+                        result = await endpoint(*args, **{**kwargs, "db": db})
+                        body = adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+                else:
+                    result = await endpoint(*args, **kwargs)
+                    body = adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+                response_cache.backend.set(etag, body)
+            if versioned:
+                headers["ETag"] = versioned_etag(json.loads(body)["version"], etag)
+            return Response(content=body, media_type="application/json", headers=headers)
+
+        return wrapper
+
+    return decorator
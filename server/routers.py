@@ -1,264 +1,707 @@
-from fastapi import FastAPI, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from server.settings import get_db
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
+from typing import Optional, Literal
+from datetime import date, timedelta
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.ext.asyncio import AsyncSession
+from server.settings import get_db, AVAILABILITY_MAX_DAYS, NEARBY_MAX_RADIUS_KM, PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX, SYNC_PAGE_SIZE
+from server.models import is_unique_violation
+from server.pagination import PageParams, paginate
+from server.availability import get_free_slots
+from server.geo import find_nearby_hospitals
+from server.timeline import get_patient_timeline
+from server.agenda import agenda_keys, agenda_keys_for, clear_agenda, get_day_agenda, invalidate_agenda
+from server.events import broker, event_bus, event_stream_response, appointment_payload, publish_appointment_event
+from server import search
+from server.sync import SYNC_MODELS, get_changes
+from server.replicas import get_read_db, read_session_factory, remember_write, replica_set, replica_health_checker
+from server.loaders import *
+from server import stats
+from server.bulk import read_bulk_rows, bulk_upsert, bulk_create_appointments
+from server.filters import PatientFilters, AppointmentFilters, MedicalRecordFilters
+from server.export import export_response
+from server.response_cache import cached_response, response_cache, versioned_etag
+from server.patching import expected_version, patch_object
 from accounts.views import auth
 from accounts.models import *
 from accounts.schemas import *
-from accounts.permissions import is_authenticated
+from accounts.permissions import is_authenticated, is_authenticated_stream
+from accounts.revocation import revocation_sweeper
 
-app = FastAPI(title="Doctor Clinic API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    sweeper = asyncio.create_task(revocation_sweeper())
+    health_checker = asyncio.create_task(replica_health_checker()) if replica_set.replicas else None
+    await broker.start(event_bus)
+    yield
+    await broker.stop()
+    sweeper.cancel()
+    if health_checker is not None:
+        health_checker.cancel()
+    await replica_set.dispose()
+
+
+app = FastAPI(title="Doctor Clinic API", lifespan=lifespan)
+
+
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    response = await call_next(request)
+    remember_write(request, response)
+    return response
+
+
+@app.exception_handler(StaleDataError)
+async def stale_data_handler(request: Request, exc: StaleDataError):
+    # version_id_col: сатр байни SELECT ва UPDATE-и PUT аз ҷониби дигар дархост тағйир ёфт
+    return JSONResponse(status_code=409, content={"detail": "The record was modified concurrently, reload and retry"})
 
 app.include_router(auth, prefix="/auth", tags=["Auth"])
 
+# Ҷавоби беморхона doctor_count ва ҷавоби духтур hospital_name дорад
+HOSPITAL_CACHE_RESOURCES = ("hospitals", "doctors")
+DOCTOR_CACHE_RESOURCES = ("doctors", "hospitals")
+
+# Майдонҳои sort-и list endpoint-ҳо; ҳар яке index-и (field, id) дорад
+HOSPITAL_SORT_FIELDS = ["id", "created_at", "name"]
+PATIENT_SORT_FIELDS = ["id", "created_at", "last_name"]
+DOCTOR_SORT_FIELDS = ["id", "last_name", "experience_years"]
+APPOINTMENT_SORT_FIELDS = ["id", "created_at", "appointment_date"]
+MEDICAL_RECORD_SORT_FIELDS = ["id", "created_at"]
+PRESCRIPTION_SORT_FIELDS = ["id", "prescribed_date"]
+
+
+async def delete_with_appointments(db: AsyncSession, instance):
+    """instance-ро бо cascade нест мекунад; қабулҳои ҳамроҳ несшуда agenda-ро бекор ва SSE мефиристанд."""
+    await db.delete(instance)
+    # AsyncSession.delete() collection-ҳои cascade-ро бор мекунад, бинобар ин қабулҳо дар db.deleted ҳастанд
+    appointments = [appointment_payload(item) for item in db.deleted if isinstance(item, Appointment)]
+    await db.commit()
+    for appointment in appointments:
+        invalidate_agenda(agenda_keys_for(appointment["doctor_id"], appointment["hospital_id"], appointment["appointment_date"]))
+    for appointment in appointments:
+        await publish_appointment_event("deleted", appointment)
+
 # ==================== HOSPITAL CRUD ====================
 
 @app.post("/hospitals", response_model=HospitalSchema, dependencies=[Depends(is_authenticated)], tags=["Hospitals"])
-async def create_hospital(data: HospitalCreateSchema, db: Session = Depends(get_db)):
+async def create_hospital(data: HospitalCreateSchema, db: AsyncSession = Depends(get_db)):
     hospital = Hospital(**data.model_dump())
     db.add(hospital)
-    db.commit()
-    db.refresh(hospital)
+    await db.commit()
+    response_cache.bump("hospitals")
+    await db.refresh(hospital, HOSPITAL_REFRESH)
     return hospital
 
-@app.get("/hospitals", response_model=list[HospitalSchema], dependencies=[Depends(is_authenticated)], tags=["Hospitals"])
-async def get_hospitals(db: Session = Depends(get_db)):
-    return db.query(Hospital).all()
+@app.get("/hospitals", response_model=Page[HospitalSchema], dependencies=[Depends(is_authenticated)], tags=["Hospitals"])
+@cached_response(Page[HospitalSchema], *HOSPITAL_CACHE_RESOURCES)
+async def get_hospitals(
+    request: Request,
+    region: Optional[str] = None,
+    city: Optional[str] = None,
+    hospital_type: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_read_db),
+):
+    stmt = select(Hospital).options(*HOSPITAL_PROFILE)
+    if region is not None:
+        stmt = stmt.filter(Hospital.region == region)
+    if city is not None:
+        stmt = stmt.filter(Hospital.city == city)
+    if hospital_type is not None:
+        stmt = stmt.filter(Hospital.hospital_type == hospital_type)
+    if is_active is not None:
+        stmt = stmt.filter(Hospital.is_active == is_active)
+    return await paginate(db, stmt, Hospital, page, sort_fields=HOSPITAL_SORT_FIELDS)
+
+@app.get("/hospitals/nearby", response_model=List[NearbyHospitalSchema], dependencies=[Depends(is_authenticated)], tags=["Hospitals"])
+async def get_nearby_hospitals(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius: float = Query(10, gt=0, le=NEARBY_MAX_RADIUS_KM, description="Radius in kilometres"),
+    specialization: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=PAGE_SIZE_MAX),
+    db: AsyncSession = Depends(get_read_db),
+):
+    nearby = await find_nearby_hospitals(db, lat, lon, radius, specialization, limit)
+    return [
+        NearbyHospitalSchema(**HospitalSchema.model_validate(hospital).model_dump(), distance_km=round(distance, 3))
+        for hospital, distance in nearby
+    ]
 
 @app.get("/hospitals/{hospital_id}", response_model=HospitalSchema, dependencies=[Depends(is_authenticated)], tags=["Hospitals"])
-async def get_hospital(hospital_id: int, db: Session = Depends(get_db)):
-    hospital = db.query(Hospital).get(hospital_id)
+@cached_response(HospitalSchema, *HOSPITAL_CACHE_RESOURCES, versioned=True)
+async def get_hospital(request: Request, hospital_id: int, db: AsyncSession = Depends(get_read_db)):
+    hospital = await db.get(Hospital, hospital_id, options=HOSPITAL_PROFILE)
     if not hospital:
         raise HTTPException(status_code=404, detail="Hospital not found")
     return hospital
 
+@app.get("/hospitals/{hospital_id}/agenda", response_model=DayAgendaSchema, dependencies=[Depends(is_authenticated)], tags=["Hospitals"])
+async def get_hospital_agenda(hospital_id: int, day: date = Query(default_factory=date.today, alias="date"), db: AsyncSession = Depends(get_read_db)):
+    return await get_day_agenda(db, "hospital", hospital_id, day)
+
+@app.get("/hospitals/{hospital_id}/stats", response_model=HospitalStatsSchema, dependencies=[Depends(is_authenticated)], tags=["Hospitals"])
+async def get_hospital_stats(
+    hospital_id: int,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    hospital = await db.get(Hospital, hospital_id)
+    if not hospital:
+        raise HTTPException(status_code=404, detail="Hospital not found")
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=30)
+    totals = await db.get(HospitalStats, hospital_id)
+    by_day = (await db.scalars(
+        select(HospitalAppointmentStats).filter(
+            HospitalAppointmentStats.hospital_id == hospital_id,
+            HospitalAppointmentStats.appointment_date >= date_from,
+            HospitalAppointmentStats.appointment_date <= date_to,
+            HospitalAppointmentStats.appointment_count != 0,
+        ).order_by(HospitalAppointmentStats.appointment_date, HospitalAppointmentStats.status)
+    )).all()
+    by_status = {}
+    for row in by_day:
+        by_status[row.status] = by_status.get(row.status, 0) + row.appointment_count
+    return {
+        "hospital_id": hospital_id,
+        "doctor_count": totals.doctor_count if totals else 0,
+        "appointment_count": totals.appointment_count if totals else 0,
+        "by_status": by_status,
+        "by_day": by_day,
+    }
+
 @app.put("/hospitals/{hospital_id}", response_model=HospitalSchema, dependencies=[Depends(is_authenticated)], tags=["Hospitals"])
-async def update_hospital(hospital_id: int, data: HospitalCreateSchema, db: Session = Depends(get_db)):
-    hospital = db.query(Hospital).get(hospital_id)
+async def update_hospital(hospital_id: int, data: HospitalCreateSchema, db: AsyncSession = Depends(get_db)):
+    hospital = await db.get(Hospital, hospital_id)
     if not hospital:
         raise HTTPException(status_code=404, detail="Hospital not found")
     for key, value in data.model_dump().items():
         setattr(hospital, key, value)
-    db.commit()
-    db.refresh(hospital)
+    await db.commit()
+    response_cache.bump("hospitals")
+    await db.refresh(hospital, HOSPITAL_REFRESH)
+    return hospital
+
+@app.patch("/hospitals/{hospital_id}", response_model=HospitalSchema, dependencies=[Depends(is_authenticated)], tags=["Hospitals"])
+async def patch_hospital(
+    request: Request,
+    hospital_id: int,
+    data: HospitalUpdateSchema,
+    response: Response,
+    version: Optional[int] = Depends(expected_version),
+    db: AsyncSession = Depends(get_db),
+):
+    hospital, _ = await patch_object(db, Hospital, hospital_id, data.model_dump(exclude_unset=True), version, "Hospital not found")
+    response_cache.bump("hospitals")
+    await db.refresh(hospital, HOSPITAL_REFRESH)
+    response.headers["ETag"] = versioned_etag(hospital.version, response_cache.etag(request, HOSPITAL_CACHE_RESOURCES))
     return hospital
 
 @app.delete("/hospitals/{hospital_id}", dependencies=[Depends(is_authenticated)], tags=["Hospitals"])
-async def delete_hospital(hospital_id: int, db: Session = Depends(get_db)):
-    hospital = db.query(Hospital).get(hospital_id)
+async def delete_hospital(hospital_id: int, db: AsyncSession = Depends(get_db)):
+    hospital = await db.get(Hospital, hospital_id)
     if not hospital:
         raise HTTPException(status_code=404, detail="Hospital not found")
-    db.delete(hospital)
-    db.commit()
+    await delete_with_appointments(db, hospital)
+    response_cache.bump("hospitals", "doctors")
     return {"detail": "Hospital deleted"}
 
 # ==================== PATIENT CRUD ====================
 
 @app.post("/patients", response_model=PatientSchema, dependencies=[Depends(is_authenticated)], tags=["Patients"])
-async def create_patient(data: PatientCreateSchema, db: Session = Depends(get_db)):
+async def create_patient(data: PatientCreateSchema, db: AsyncSession = Depends(get_db)):
     patient = Patient(**data.model_dump())
     db.add(patient)
-    db.commit()
-    db.refresh(patient)
+    await db.commit()
+    await db.refresh(patient)
     return patient
 
-@app.get("/patients", response_model=list[PatientSchema], dependencies=[Depends(is_authenticated)], tags=["Patients"])
-async def get_patients(db: Session = Depends(get_db)):
-    return db.query(Patient).all()
+@app.post("/patients/bulk", response_model=BulkResultSchema, dependencies=[Depends(is_authenticated)], tags=["Patients"])
+async def bulk_create_patients(request: Request, on_conflict: Literal["update", "skip"] = "update", db: AsyncSession = Depends(get_db)):
+    rows = await read_bulk_rows(request)
+    result = await bulk_upsert(db, rows, Patient, PatientCreateSchema, "passport_number", on_conflict)
+    if result["updated"]:
+        clear_agenda()
+    return result
+
+@app.get("/patients", response_model=Page[PatientSchema], dependencies=[Depends(is_authenticated)], tags=["Patients"])
+async def get_patients(
+    filters: PatientFilters = Depends(),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_read_db),
+):
+    stmt = filters.apply(select(Patient))
+    return await paginate(db, stmt, Patient, page, sort_fields=PATIENT_SORT_FIELDS)
+
+@app.get("/patients/search", response_model=Page[PatientSchema], dependencies=[Depends(is_authenticated)], tags=["Patients"])
+async def search_patients(
+    q: str = Query(..., min_length=3, description="Name, phone or passport fragment"),
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    return await search.search(db, Patient, q, limit, cursor)
+
+@app.get("/patients/export", dependencies=[Depends(is_authenticated_stream)], tags=["Patients"])
+async def export_patients(request: Request, filters: PatientFilters = Depends(), format: Literal["ndjson", "csv"] = "ndjson"):
+    return export_response(read_session_factory(request), Patient, filters, format, "patients")
 
 @app.get("/patients/{patient_id}", response_model=PatientSchema, dependencies=[Depends(is_authenticated)], tags=["Patients"])
-async def get_patient(patient_id: int, db: Session = Depends(get_db)):
-    patient = db.query(Patient).get(patient_id)
+async def get_patient(patient_id: int, response: Response, db: AsyncSession = Depends(get_read_db)):
+    patient = await db.get(Patient, patient_id)
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
+    response.headers["ETag"] = f'"{patient.version}"'
     return patient
 
+@app.get("/patients/{patient_id}/timeline", response_model=Page[TimelineEntrySchema], dependencies=[Depends(is_authenticated)], tags=["Patients"])
+async def get_patient_timeline_view(
+    patient_id: int,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    if not await db.get(Patient, patient_id):
+        raise HTTPException(status_code=404, detail="Patient not found")
+    return await get_patient_timeline(db, patient_id, limit, cursor)
+
 @app.put("/patients/{patient_id}", response_model=PatientSchema, dependencies=[Depends(is_authenticated)], tags=["Patients"])
-async def update_patient(patient_id: int, data: PatientCreateSchema, db: Session = Depends(get_db)):
-    patient = db.query(Patient).get(patient_id)
+async def update_patient(patient_id: int, data: PatientCreateSchema, db: AsyncSession = Depends(get_db)):
+    patient = await db.get(Patient, patient_id)
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     for key, value in data.model_dump().items():
         setattr(patient, key, value)
-    db.commit()
-    db.refresh(patient)
+    await db.commit()
+    clear_agenda()
+    await db.refresh(patient)
+    return patient
+
+@app.patch("/patients/{patient_id}", response_model=PatientSchema, dependencies=[Depends(is_authenticated)], tags=["Patients"])
+async def patch_patient(
+    patient_id: int,
+    data: PatientUpdateSchema,
+    response: Response,
+    version: Optional[int] = Depends(expected_version),
+    db: AsyncSession = Depends(get_db),
+):
+    patient, _ = await patch_object(
+        db, Patient, patient_id, data.model_dump(exclude_unset=True), version, "Patient not found",
+        conflict_detail="Patient with this passport number already exists")
+    clear_agenda()
+    response.headers["ETag"] = f'"{patient.version}"'
     return patient
 
 @app.delete("/patients/{patient_id}", dependencies=[Depends(is_authenticated)], tags=["Patients"])
-async def delete_patient(patient_id: int, db: Session = Depends(get_db)):
-    patient = db.query(Patient).get(patient_id)
+async def delete_patient(patient_id: int, db: AsyncSession = Depends(get_db)):
+    patient = await db.get(Patient, patient_id)
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
-    db.delete(patient)
-    db.commit()
+    await delete_with_appointments(db, patient)
     return {"detail": "Patient deleted"}
 
 # ==================== DOCTOR CRUD ====================
 
 @app.post("/doctors", response_model=DoctorSchema, dependencies=[Depends(is_authenticated)], tags=["Doctors"])
-async def create_doctor(data: DoctorCreateSchema, db: Session = Depends(get_db)):
+async def create_doctor(data: DoctorCreateSchema, db: AsyncSession = Depends(get_db)):
     doctor = Doctor(**data.model_dump())
     db.add(doctor)
-    db.commit()
-    db.refresh(doctor)
+    await db.commit()
+    response_cache.bump("doctors")
+    await db.refresh(doctor, DOCTOR_REFRESH)
     return doctor
 
-@app.get("/doctors", response_model=list[DoctorSchema], dependencies=[Depends(is_authenticated)], tags=["Doctors"])
-async def get_doctors(db: Session = Depends(get_db)):
-    return db.query(Doctor).all()
+@app.post("/doctors/bulk", response_model=BulkResultSchema, dependencies=[Depends(is_authenticated)], tags=["Doctors"])
+async def bulk_create_doctors(request: Request, on_conflict: Literal["update", "skip"] = "update", db: AsyncSession = Depends(get_db)):
+    rows = await read_bulk_rows(request)
+    result = await bulk_upsert(db, rows, Doctor, DoctorCreateSchema, "license_number", on_conflict)
+    response_cache.bump("doctors")
+    if result["updated"]:
+        clear_agenda()
+    return result
+
+@app.get("/doctors", response_model=Page[DoctorSchema], dependencies=[Depends(is_authenticated)], tags=["Doctors"])
+@cached_response(Page[DoctorSchema], *DOCTOR_CACHE_RESOURCES)
+async def get_doctors(
+    request: Request,
+    specialization: Optional[str] = None,
+    hospital_id: Optional[int] = None,
+    department_id: Optional[int] = None,
+    is_available: Optional[bool] = None,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_read_db),
+):
+    stmt = select(Doctor).options(*DOCTOR_PROFILE)
+    if specialization is not None:
+        stmt = stmt.filter(Doctor.specialization == specialization)
+    if hospital_id is not None:
+        stmt = stmt.filter(Doctor.hospital_id == hospital_id)
+    if department_id is not None:
+        stmt = stmt.filter(Doctor.department_id == department_id)
+    if is_available is not None:
+        stmt = stmt.filter(Doctor.is_available == is_available)
+    return await paginate(db, stmt, Doctor, page, sort_fields=DOCTOR_SORT_FIELDS)
+
+def validate_availability_range(date_from: date, date_to: date):
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (date_to - date_from).days >= AVAILABILITY_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range must not exceed {AVAILABILITY_MAX_DAYS} days")
+
+@app.get("/doctors/search", response_model=Page[DoctorSchema], dependencies=[Depends(is_authenticated)], tags=["Doctors"])
+async def search_doctors(
+    q: str = Query(..., min_length=3, description="Name, specialization or license fragment"),
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    return await search.search(db, Doctor, q, limit, cursor, options=DOCTOR_PROFILE)
+
+@app.get("/doctors/availability", response_model=Page[DoctorAvailabilitySchema], dependencies=[Depends(is_authenticated)], tags=["Doctors"])
+async def get_doctors_availability(
+    date_from: date = Query(alias="from"),
+    date_to: date = Query(alias="to"),
+    specialization: Optional[str] = None,
+    region: Optional[str] = None,
+    hospital_id: Optional[int] = None,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_read_db),
+):
+    validate_availability_range(date_from, date_to)
+    stmt = select(Doctor).filter(Doctor.is_available == True)
+    if specialization is not None:
+        stmt = stmt.filter(Doctor.specialization == specialization)
+    if hospital_id is not None:
+        stmt = stmt.filter(Doctor.hospital_id == hospital_id)
+    if region is not None:
+        stmt = stmt.join(Hospital, Doctor.hospital_id == Hospital.id).filter(Hospital.region == region)
+    doctors = await paginate(db, stmt, Doctor, page, sort_fields=["id"])
+    doctor_ids = [doctor.id for doctor in doctors["items"]]
+    free_slots = await get_free_slots(db, doctor_ids, date_from, date_to)
+    return {
+        "items": [{"doctor_id": doctor_id, "slots": free_slots[doctor_id]} for doctor_id in doctor_ids],
+        "next_cursor": doctors["next_cursor"],
+    }
+
+@app.get("/doctors/{doctor_id}/availability", response_model=DoctorAvailabilitySchema, dependencies=[Depends(is_authenticated)], tags=["Doctors"])
+async def get_doctor_availability(
+    doctor_id: int,
+    date_from: date = Query(alias="from"),
+    date_to: date = Query(alias="to"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    validate_availability_range(date_from, date_to)
+    doctor = await db.get(Doctor, doctor_id)
+    if not doctor:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    if not doctor.is_available:
+        return {"doctor_id": doctor_id, "slots": []}
+    free_slots = await get_free_slots(db, [doctor_id], date_from, date_to)
+    return {"doctor_id": doctor_id, "slots": free_slots[doctor_id]}
+
+@app.get("/doctors/{doctor_id}/agenda", response_model=DayAgendaSchema, dependencies=[Depends(is_authenticated)], tags=["Doctors"])
+async def get_doctor_agenda(doctor_id: int, day: date = Query(default_factory=date.today, alias="date"), db: AsyncSession = Depends(get_read_db)):
+    return await get_day_agenda(db, "doctor", doctor_id, day)
 
 @app.get("/doctors/{doctor_id}", response_model=DoctorSchema, dependencies=[Depends(is_authenticated)], tags=["Doctors"])
-async def get_doctor(doctor_id: int, db: Session = Depends(get_db)):
-    doctor = db.query(Doctor).get(doctor_id)
+@cached_response(DoctorSchema, *DOCTOR_CACHE_RESOURCES, versioned=True)
+async def get_doctor(request: Request, doctor_id: int, db: AsyncSession = Depends(get_read_db)):
+    doctor = await db.get(Doctor, doctor_id, options=DOCTOR_PROFILE)
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
     return doctor
 
 @app.put("/doctors/{doctor_id}", response_model=DoctorSchema, dependencies=[Depends(is_authenticated)], tags=["Doctors"])
-async def update_doctor(doctor_id: int, data: DoctorCreateSchema, db: Session = Depends(get_db)):
-    doctor = db.query(Doctor).get(doctor_id)
+async def update_doctor(doctor_id: int, data: DoctorCreateSchema, db: AsyncSession = Depends(get_db)):
+    doctor = await db.get(Doctor, doctor_id)
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
     for key, value in data.model_dump().items():
         setattr(doctor, key, value)
-    db.commit()
-    db.refresh(doctor)
+    await db.commit()
+    response_cache.bump("doctors")
+    # doctor_name дар agenda-ҳои духтур ва беморхона ҳаст
+    clear_agenda()
+    await db.refresh(doctor, DOCTOR_REFRESH)
+    return doctor
+
+@app.patch("/doctors/{doctor_id}", response_model=DoctorSchema, dependencies=[Depends(is_authenticated)], tags=["Doctors"])
+async def patch_doctor(
+    request: Request,
+    doctor_id: int,
+    data: DoctorUpdateSchema,
+    response: Response,
+    version: Optional[int] = Depends(expected_version),
+    db: AsyncSession = Depends(get_db),
+):
+    doctor, _ = await patch_object(db, Doctor, doctor_id, data.model_dump(exclude_unset=True), version, "Doctor not found")
+    response_cache.bump("doctors")
+    clear_agenda()
+    await db.refresh(doctor, DOCTOR_REFRESH)
+    response.headers["ETag"] = versioned_etag(doctor.version, response_cache.etag(request, DOCTOR_CACHE_RESOURCES))
     return doctor
 
 @app.delete("/doctors/{doctor_id}", dependencies=[Depends(is_authenticated)], tags=["Doctors"])
-async def delete_doctor(doctor_id: int, db: Session = Depends(get_db)):
-    doctor = db.query(Doctor).get(doctor_id)
+async def delete_doctor(doctor_id: int, db: AsyncSession = Depends(get_db)):
+    doctor = await db.get(Doctor, doctor_id)
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
-    db.delete(doctor)
-    db.commit()
+    await delete_with_appointments(db, doctor)
+    response_cache.bump("doctors")
     return {"detail": "Doctor deleted"}
 
 # ==================== APPOINTMENT CRUD ====================
 
+async def commit_appointment(db: AsyncSession):
+    # Unique index-и uq_appointments_doctor_slot дубликатҳоро рад мекунад, бе lock дар Python.
+    # Он ягона unique-и ҷадвали appointments аст; NOT NULL ва foreign key 400 медиҳанд
+    try:
+        await db.commit()
+    except IntegrityError as error:
+        await db.rollback()
+        if is_unique_violation(error):
+            raise HTTPException(status_code=409, detail="This time slot is already booked for the doctor")
+        raise HTTPException(status_code=400, detail="Appointment violates a database constraint")
+
 @app.post("/appointments", response_model=AppointmentSchema, dependencies=[Depends(is_authenticated)], tags=["Appointments"])
-async def create_appointment(data: AppointmentCreateSchema, db: Session = Depends(get_db)):
+async def create_appointment(data: AppointmentCreateSchema, db: AsyncSession = Depends(get_db)):
     appointment = Appointment(**data.model_dump())
     db.add(appointment)
-    db.commit()
-    db.refresh(appointment)
+    await commit_appointment(db)
+    invalidate_agenda(agenda_keys(appointment))
+    await publish_appointment_event("created", appointment_payload(appointment))
+    await db.refresh(appointment, APPOINTMENT_REFRESH)
     return appointment
 
-@app.get("/appointments", response_model=list[AppointmentSchema], dependencies=[Depends(is_authenticated)], tags=["Appointments"])
-async def get_appointments(db: Session = Depends(get_db)):
-    return db.query(Appointment).all()
+@app.post("/appointments/bulk", response_model=BulkResultSchema, dependencies=[Depends(is_authenticated)], tags=["Appointments"])
+async def bulk_create_appointments_view(request: Request, db: AsyncSession = Depends(get_db)):
+    rows = await read_bulk_rows(request)
+    return await bulk_create_appointments(db, rows)
+
+@app.get("/appointments", response_model=Page[AppointmentSchema], dependencies=[Depends(is_authenticated)], tags=["Appointments"])
+async def get_appointments(
+    filters: AppointmentFilters = Depends(),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_read_db),
+):
+    stmt = filters.apply(select(Appointment).options(*APPOINTMENT_PROFILE))
+    return await paginate(db, stmt, Appointment, page, sort_fields=APPOINTMENT_SORT_FIELDS)
+
+@app.get("/appointments/export", dependencies=[Depends(is_authenticated_stream)], tags=["Appointments"])
+async def export_appointments(request: Request, filters: AppointmentFilters = Depends(), format: Literal["ndjson", "csv"] = "ndjson"):
+    return export_response(read_session_factory(request), Appointment, filters, format, "appointments")
+
+@app.get("/appointments/events", dependencies=[Depends(is_authenticated_stream)], tags=["Appointments"])
+async def appointment_events(request: Request, hospital_id: Optional[int] = None, doctor_id: Optional[int] = None):
+    return event_stream_response(request, hospital_id, doctor_id)
 
 @app.get("/appointments/{appointment_id}", response_model=AppointmentSchema, dependencies=[Depends(is_authenticated)], tags=["Appointments"])
-async def get_appointment(appointment_id: int, db: Session = Depends(get_db)):
-    appointment = db.query(Appointment).get(appointment_id)
+async def get_appointment(appointment_id: int, response: Response, db: AsyncSession = Depends(get_read_db)):
+    appointment = await db.get(Appointment, appointment_id, options=APPOINTMENT_PROFILE)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
+    response.headers["ETag"] = f'"{appointment.version}"'
     return appointment
 
 @app.put("/appointments/{appointment_id}", response_model=AppointmentSchema, dependencies=[Depends(is_authenticated)], tags=["Appointments"])
-async def update_appointment(appointment_id: int, data: AppointmentCreateSchema, db: Session = Depends(get_db)):
-    appointment = db.query(Appointment).get(appointment_id)
+async def update_appointment(appointment_id: int, data: AppointmentCreateSchema, db: AsyncSession = Depends(get_db)):
+    appointment = await db.get(Appointment, appointment_id)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
+    old_keys = agenda_keys(appointment)
+    previous = appointment_payload(appointment)
     for key, value in data.model_dump().items():
         setattr(appointment, key, value)
-    db.commit()
-    db.refresh(appointment)
+    await commit_appointment(db)
+    invalidate_agenda(old_keys + agenda_keys(appointment))
+    await publish_appointment_event("updated", appointment_payload(appointment), previous)
+    await db.refresh(appointment, APPOINTMENT_REFRESH)
+    return appointment
+
+@app.patch("/appointments/{appointment_id}", response_model=AppointmentSchema, dependencies=[Depends(is_authenticated)], tags=["Appointments"])
+async def patch_appointment(
+    appointment_id: int,
+    data: AppointmentUpdateSchema,
+    response: Response,
+    version: Optional[int] = Depends(expected_version),
+    db: AsyncSession = Depends(get_db),
+):
+    appointment, previous = await patch_object(
+        db, Appointment, appointment_id, data.model_dump(exclude_unset=True), version, "Appointment not found",
+        conflict_detail="This time slot is already booked for the doctor")
+    old_keys = agenda_keys_for(previous["doctor_id"], previous["hospital_id"], previous["appointment_date"]) if previous else []
+    invalidate_agenda(old_keys + agenda_keys(appointment))
+    await publish_appointment_event(
+        "updated", appointment_payload(appointment),
+        {key: previous[key] for key in appointment_payload(appointment)} if previous else None)
+    await db.refresh(appointment, APPOINTMENT_REFRESH)
+    response.headers["ETag"] = f'"{appointment.version}"'
     return appointment
 
 @app.delete("/appointments/{appointment_id}", dependencies=[Depends(is_authenticated)], tags=["Appointments"])
-async def delete_appointment(appointment_id: int, db: Session = Depends(get_db)):
-    appointment = db.query(Appointment).get(appointment_id)
+async def delete_appointment(appointment_id: int, db: AsyncSession = Depends(get_db)):
+    appointment = await db.get(Appointment, appointment_id)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
-    db.delete(appointment)
-    db.commit()
+    await db.delete(appointment)
+    await db.commit()
+    invalidate_agenda(agenda_keys(appointment))
+    await publish_appointment_event("deleted", appointment_payload(appointment))
     return {"detail": "Appointment deleted"}
 
 
 # ==================== MEDICAL RECORD CRUD ====================
 
 @app.post("/medical_records", response_model=MedicalRecordSchema, dependencies=[Depends(is_authenticated)], tags=["Medical Records"])
-async def create_medical_record(data: MedicalRecordCreateSchema, db: Session = Depends(get_db)):
+async def create_medical_record(data: MedicalRecordCreateSchema, db: AsyncSession = Depends(get_db)):
     record = MedicalRecord(**data.model_dump())
     db.add(record)
-    db.commit()
-    db.refresh(record)
+    await db.commit()
+    await db.refresh(record, MEDICAL_RECORD_REFRESH)
     return record
 
-@app.get("/medical_records", response_model=list[MedicalRecordSchema], dependencies=[Depends(is_authenticated)], tags=["Medical Records"])
-async def get_medical_records(db: Session = Depends(get_db)):
-    return db.query(MedicalRecord).all()
+@app.get("/medical_records", response_model=Page[MedicalRecordSchema], dependencies=[Depends(is_authenticated)], tags=["Medical Records"])
+async def get_medical_records(
+    filters: MedicalRecordFilters = Depends(),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_read_db),
+):
+    stmt = filters.apply(select(MedicalRecord).options(*MEDICAL_RECORD_PROFILE))
+    return await paginate(db, stmt, MedicalRecord, page, sort_fields=MEDICAL_RECORD_SORT_FIELDS)
+
+@app.get("/medical_records/export", dependencies=[Depends(is_authenticated_stream)], tags=["Medical Records"])
+async def export_medical_records(request: Request, filters: MedicalRecordFilters = Depends(), format: Literal["ndjson", "csv"] = "ndjson"):
+    return export_response(read_session_factory(request), MedicalRecord, filters, format, "medical_records")
 
 @app.get("/medical_records/{record_id}", response_model=MedicalRecordSchema, dependencies=[Depends(is_authenticated)], tags=["Medical Records"])
-async def get_medical_record(record_id: int, db: Session = Depends(get_db)):
-    record = db.query(MedicalRecord).get(record_id)
+async def get_medical_record(record_id: int, response: Response, db: AsyncSession = Depends(get_read_db)):
+    record = await db.get(MedicalRecord, record_id, options=MEDICAL_RECORD_PROFILE)
     if not record:
         raise HTTPException(status_code=404, detail="Medical record not found")
+    response.headers["ETag"] = f'"{record.version}"'
     return record
 
 @app.put("/medical_records/{record_id}", response_model=MedicalRecordSchema, dependencies=[Depends(is_authenticated)], tags=["Medical Records"])
-async def update_medical_record(record_id: int, data: MedicalRecordCreateSchema, db: Session = Depends(get_db)):
-    record = db.query(MedicalRecord).get(record_id)
+async def update_medical_record(record_id: int, data: MedicalRecordCreateSchema, db: AsyncSession = Depends(get_db)):
+    record = await db.get(MedicalRecord, record_id)
     if not record:
         raise HTTPException(status_code=404, detail="Medical record not found")
     for key, value in data.model_dump().items():
         setattr(record, key, value)
-    db.commit()
-    db.refresh(record)
+    await db.commit()
+    await db.refresh(record, MEDICAL_RECORD_REFRESH)
+    return record
+
+@app.patch("/medical_records/{record_id}", response_model=MedicalRecordSchema, dependencies=[Depends(is_authenticated)], tags=["Medical Records"])
+async def patch_medical_record(
+    record_id: int,
+    data: MedicalRecordUpdateSchema,
+    response: Response,
+    version: Optional[int] = Depends(expected_version),
+    db: AsyncSession = Depends(get_db),
+):
+    record, _ = await patch_object(db, MedicalRecord, record_id, data.model_dump(exclude_unset=True), version, "Medical record not found")
+    await db.refresh(record, MEDICAL_RECORD_REFRESH)
+    response.headers["ETag"] = f'"{record.version}"'
     return record
 
 @app.delete("/medical_records/{record_id}", dependencies=[Depends(is_authenticated)], tags=["Medical Records"])
-async def delete_medical_record(record_id: int, db: Session = Depends(get_db)):
-    record = db.query(MedicalRecord).get(record_id)
+async def delete_medical_record(record_id: int, db: AsyncSession = Depends(get_db)):
+    record = await db.get(MedicalRecord, record_id)
     if not record:
         raise HTTPException(status_code=404, detail="Medical record not found")
-    db.delete(record)
-    db.commit()
+    await db.delete(record)
+    await db.commit()
     return {"detail": "Medical record deleted"}
 
 
 # ==================== PRESCRIPTION CRUD ====================
 
 @app.post("/prescriptions", response_model=PrescriptionSchema, dependencies=[Depends(is_authenticated)], tags=["Prescriptions"])
-async def create_prescription(data: PrescriptionCreateSchema, db: Session = Depends(get_db)):
+async def create_prescription(data: PrescriptionCreateSchema, db: AsyncSession = Depends(get_db)):
     prescription = Prescription(**data.model_dump())
     db.add(prescription)
-    db.commit()
-    db.refresh(prescription)
+    await db.commit()
+    await db.refresh(prescription)
     return prescription
 
-@app.get("/prescriptions", response_model=list[PrescriptionSchema], dependencies=[Depends(is_authenticated)], tags=["Prescriptions"])
-async def get_prescriptions(db: Session = Depends(get_db)):
-    return db.query(Prescription).all()
+@app.get("/prescriptions", response_model=Page[PrescriptionSchema], dependencies=[Depends(is_authenticated)], tags=["Prescriptions"])
+async def get_prescriptions(
+    medical_record_id: Optional[int] = None,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_read_db),
+):
+    stmt = select(Prescription)
+    if medical_record_id is not None:
+        stmt = stmt.filter(Prescription.medical_record_id == medical_record_id)
+    return await paginate(db, stmt, Prescription, page, sort_fields=PRESCRIPTION_SORT_FIELDS)
 
 @app.get("/prescriptions/{prescription_id}", response_model=PrescriptionSchema, dependencies=[Depends(is_authenticated)], tags=["Prescriptions"])
-async def get_prescription(prescription_id: int, db: Session = Depends(get_db)):
-    prescription = db.query(Prescription).get(prescription_id)
+async def get_prescription(prescription_id: int, response: Response, db: AsyncSession = Depends(get_read_db)):
+    prescription = await db.get(Prescription, prescription_id)
     if not prescription:
         raise HTTPException(status_code=404, detail="Prescription not found")
+    response.headers["ETag"] = f'"{prescription.version}"'
     return prescription
 
 @app.put("/prescriptions/{prescription_id}", response_model=PrescriptionSchema, dependencies=[Depends(is_authenticated)], tags=["Prescriptions"])
-async def update_prescription(prescription_id: int, data: PrescriptionCreateSchema, db: Session = Depends(get_db)):
-    prescription = db.query(Prescription).get(prescription_id)
+async def update_prescription(prescription_id: int, data: PrescriptionCreateSchema, db: AsyncSession = Depends(get_db)):
+    prescription = await db.get(Prescription, prescription_id)
     if not prescription:
         raise HTTPException(status_code=404, detail="Prescription not found")
     for key, value in data.model_dump().items():
         setattr(prescription, key, value)
-    db.commit()
-    db.refresh(prescription)
+    await db.commit()
+    await db.refresh(prescription)
+    return prescription
+
+@app.patch("/prescriptions/{prescription_id}", response_model=PrescriptionSchema, dependencies=[Depends(is_authenticated)], tags=["Prescriptions"])
+async def patch_prescription(
+    prescription_id: int,
+    data: PrescriptionUpdateSchema,
+    response: Response,
+    version: Optional[int] = Depends(expected_version),
+    db: AsyncSession = Depends(get_db),
+):
+    prescription, _ = await patch_object(
+        db, Prescription, prescription_id, data.model_dump(exclude_unset=True), version, "Prescription not found")
+    response.headers["ETag"] = f'"{prescription.version}"'
     return prescription
 
 @app.delete("/prescriptions/{prescription_id}", dependencies=[Depends(is_authenticated)], tags=["Prescriptions"])
-async def delete_prescription(prescription_id: int, db: Session = Depends(get_db)):
-    prescription = db.query(Prescription).get(prescription_id)
+async def delete_prescription(prescription_id: int, db: AsyncSession = Depends(get_db)):
+    prescription = await db.get(Prescription, prescription_id)
     if not prescription:
         raise HTTPException(status_code=404, detail="Prescription not found")
-    db.delete(prescription)
-    db.commit()
+    await db.delete(prescription)
+    await db.commit()
     return {"detail": "Prescription deleted"}
 
 
+# ==================== SYNC ====================
+
+@app.get("/sync", response_model=SyncPageSchema, dependencies=[Depends(is_authenticated)], tags=["Sync"])
+async def sync_changes(
+    since: int = Query(0, ge=0, description="Cursor from the previous response, 0 for a full sync"),
+    tables: Optional[List[str]] = Query(None),
+    limit: int = Query(SYNC_PAGE_SIZE, ge=1, le=SYNC_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    unknown = set(tables or []) - set(SYNC_MODELS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown tables: {', '.join(sorted(unknown))}")
+    return await get_changes(db, since, tables, limit)
+
+
 # ==================== ROOT ====================
 
 @app.get("/")
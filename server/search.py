@@ -0,0 +1,104 @@
+import re
+
+from fastapi import HTTPException, status
+from sqlalchemy import DDL, column, event, func, literal, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from accounts.models import Doctor, Patient
+from server.pagination import decode_cursor, encode_cursor
+
+# Ҷустуҷӯи пурраматнӣ барои қабулгоҳ.
+# SQLite: ҷадвалҳои FTS5 бо tokenizer-и trigram (external content), ки бо trigger-ҳо
+# ҳамзамон мешаванд, пас insert-и оммавӣ (Core) ҳам индекс мешавад.
+# PostgreSQL: индекси GIN бо pg_trgm рӯи ҳамон сутунҳо.
+# Ҳарду бо trigram кор мекунанд: зерсатр ("rahm" -> "Rahmonov") ва хатои хурд
+# ("Rahmonv") ҳам ёфта мешаванд, натиҷаҳои бештар мувофиқ дар боло.
+
+SEARCH_COLUMNS = {
+    Patient: ("first_name", "last_name", "middle_name", "phone", "passport_number"),
+    Doctor: ("first_name", "last_name", "middle_name", "specialization", "license_number"),
+}
+
+
+def _sqlite_ddl(source: str, columns):
+    fts = f"{source}_fts"
+    names = ", ".join(columns)
+    new_values = ", ".join(f"new.{name}" for name in columns)
+    old_values = ", ".join(f"old.{name}" for name in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, content='{source}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {source} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {source} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values}); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def _postgresql_expression_sql(columns):
+    return " || ' ' || ".join(f"coalesce({name}, '')" for name in columns)
+
+
+def _postgresql_ddl(source: str, columns):
+    return [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        f"CREATE INDEX IF NOT EXISTS ix_{source}_search_trgm ON {source} "
+        f"USING gin (({_postgresql_expression_sql(columns)}) gin_trgm_ops)",
+    ]
+
+
+# Барои create_all (alembic ҳамин DDL-ро дар migration иҷро мекунад)
+for _model, _columns in SEARCH_COLUMNS.items():
+    for _statement in _sqlite_ddl(_model.__tablename__, _columns):
+        event.listen(_model.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+    for _statement in _postgresql_ddl(_model.__tablename__, _columns):
+        event.listen(_model.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+
+
+def _trigram_query(query: str) -> str:
+    # Ҳар калима ба trigram-ҳо ҷудо мешавад ва бо OR пайваст: bm25 сатрҳоеро,
+    # ки trigram-ҳои бештар доранд, болотар мегузорад
+    trigrams = []
+    for word in re.findall(r"\w+", query.lower()):
+        for start in range(len(word) - 2):
+            trigram = '"' + word[start:start + 3] + '"'
+            if trigram not in trigrams:
+                trigrams.append(trigram)
+    if not trigrams:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Search query must contain a word of at least 3 characters")
+    return " OR ".join(trigrams)
+
+
+def _ranked_statement(dialect_name: str, model, query: str):
+    columns = SEARCH_COLUMNS[model]
+    if dialect_name == "postgresql":
+        expression = text(f"({_postgresql_expression_sql(columns)})")
+        score = func.word_similarity(literal(query), expression)
+        return select(model).filter(literal(query).op("<%")(expression)).order_by(score.desc(), model.id)
+
+    fts_name = f"{model.__tablename__}_fts"
+    fts = table(fts_name, column("rowid"))
+    return (
+        select(model)
+        .join(fts, fts.c.rowid == model.id)
+        .filter(text(f"{fts_name} MATCH :search_query").bindparams(search_query=_trigram_query(query)))
+        .order_by(text(f"bm25({fts_name})"), model.id)
+    )
+
+
+async def search(db: AsyncSession, model, query: str, limit: int, cursor: str = None, options=()):
+    """Натиҷаҳои мураттаб бо саҳифабандӣ; cursor offset-и саҳифаи навбатиро нигоҳ медорад."""
+    offset = decode_cursor(cursor, model.id)[0] if cursor else 0
+    dialect_name = (await db.connection()).dialect.name
+    stmt = _ranked_statement(dialect_name, model, query).options(*options)
+    rows = (await db.scalars(stmt.offset(offset).limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(offset + limit, rows[-1].id)
+    return {"items": rows, "next_cursor": next_cursor}
@@ -1,5 +1,6 @@
-﻿from sqlalchemy import create_engine
+﻿from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from datetime import timedelta
 from dotenv import load_dotenv
 from pathlib import Path
@@ -18,19 +19,88 @@ else:
 # SQLite барои соддагӣ; дар production PostgreSQL ё MySQL истифода кунед
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./clinic_tj.db")
 
+# SQLite: pragma-ҳое, ки ҳангоми ҳар пайвастшавӣ иҷро мешаванд.
+# WAL хонандагонро аз нависанда ҷудо мекунад, busy_timeout ба ҷои "database is locked" интизор мешавад
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", 5000))  # ms
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 268435456))  # bytes
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", -65536))  # манфӣ = KiB
+
+# PostgreSQL/MySQL: танзимоти pool
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT}")
+    cursor.execute(f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size = {SQLITE_CACHE_SIZE}")
+    cursor.close()
+
+
+def engine_options(url: str) -> dict:
+    if url.startswith("sqlite"):
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def create_database_engine(url: str, is_async: bool = False):
+    """Движак бо танзимоти pool ва pragma-ҳои SQLite аз рӯи URL."""
+    engine = (create_async_engine if is_async else create_engine)(url, **engine_options(url))
+    if url.startswith("sqlite") and ":memory:" not in url:
+        event.listen(engine.sync_engine if is_async else engine, "connect", _apply_sqlite_pragmas)
+    return engine
+
+
 # Эҷоди движак (барои пайвастшавӣ ба базаи додаҳо)
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+engine = create_database_engine(SQLALCHEMY_DATABASE_URL)
 
-# SessionLocal як фабрика барои сессияҳои базаи додаҳо аст
+# SessionLocal як фабрика барои сессияҳои базаи додаҳо аст (барои alembic ва seeds)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+def get_async_database_url(url: str) -> str:
+    # Драйвери асинхрониро ба URL илова мекунем, агар он нишон дода нашуда бошад
+    if url.startswith("sqlite:///"):
+        return url.replace("sqlite:///", "sqlite+aiosqlite:///", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", get_async_database_url(SQLALCHEMY_DATABASE_URL))
+
+# Движаки асинхронӣ барои handler-ҳо, то ки query-ҳо event loop-ро банд накунанд
+async_engine = create_database_engine(ASYNC_DATABASE_URL, is_async=True)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+# Replica-ҳо барои GET endpoint-ҳо (URL-ҳо бо вергул ҷудо); холӣ = ҳама аз primary
+READ_REPLICA_URLS = [url.strip() for url in os.getenv("READ_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_HEALTH_INTERVAL = int(os.getenv("REPLICA_HEALTH_INTERVAL", 10))
+# Баъди навишт клиент чанд сония аз primary мехонад
+READ_YOUR_WRITES_WINDOW = int(os.getenv("READ_YOUR_WRITES_WINDOW", 5))
 
 # Барои debugging, маълумоти .env-ро чоп кунем
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
@@ -44,3 +114,63 @@ print(f"=== END DEBUG ===")
 
 ACCESSTOKEN_EXPIRED_TIME = timedelta(minutes=15)
 REFRESHTOKEN_EXPIRED_TIME = timedelta(days=7)
+
+# Кэши токенҳои тафтишшуда; TTL муайян мекунад, ки logout дар дигар worker-ҳо чӣ қадар дер дида мешавад
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", 60))
+
+# Кэши иҷозатҳои воқеии корбар (roles + permissions)
+PERMISSION_CACHE_SIZE = int(os.getenv("PERMISSION_CACHE_SIZE", 10000))
+PERMISSION_CACHE_TTL = int(os.getenv("PERMISSION_CACHE_TTL", 60))
+
+# Агар true бошад, roles ва permissions дар худи access token навишта мешаванд
+TOKEN_EMBED_PERMISSIONS = os.getenv("TOKEN_EMBED_PERMISSIONS", "false").lower() == "true"
+
+# Pool барои Argon2: шумораи thread-ҳо ва навбати максималӣ (баъд аз он 503)
+HASHING_WORKERS = int(os.getenv("HASHING_WORKERS", os.cpu_count() or 2))
+HASHING_QUEUE_LIMIT = int(os.getenv("HASHING_QUEUE_LIMIT", 64))
+
+# Параметрҳои Argon2 (пешфарз ба мисли passlib); барои интихоб `python manage.py calibrate-argon2`
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", 3))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", 65536))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", 4))
+
+# Нигаҳдории токенҳои бекоршуда (аз рӯи jti) ва филтри Bloom дар хотира.
+# Logout дар як worker дар дигарҳо баъди ҳадди аксар REVOCATION_SWEEP_INTERVAL сония эътибор пайдо мекунад
+REVOCATION_SWEEP_INTERVAL = int(os.getenv("REVOCATION_SWEEP_INTERVAL", 60))
+REVOCATION_BLOOM_ENABLED = os.getenv("REVOCATION_BLOOM_ENABLED", "true").lower() == "true"
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", 100000))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", 0.01))
+
+# Кэши ҷавобҳои GET /hospitals ва /doctors (ETag); TTL кӯҳнагиро дар дигар worker-ҳо маҳдуд мекунад
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 1000))
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", 300))
+
+# Кэши ҷадвали рӯзонаи духтур/беморхона (agenda)
+AGENDA_CACHE_SIZE = int(os.getenv("AGENDA_CACHE_SIZE", 10000))
+AGENDA_CACHE_TTL = int(os.getenv("AGENDA_CACHE_TTL", 30))
+
+# SSE-и тағйироти қабулҳо: навбати ҳар обуначӣ ва фосилаи ping (сония)
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", 1000))
+EVENT_HEARTBEAT_INTERVAL = int(os.getenv("EVENT_HEARTBEAT_INTERVAL", 15))
+
+# GET /sync: шумораи тағйирот дар як ҷавоб ва муддати нигоҳдории tombstone-ҳо
+SYNC_PAGE_SIZE = int(os.getenv("SYNC_PAGE_SIZE", 1000))
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", 30))
+
+# Андозаи саҳифа барои list endpoint-ҳо
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", 50))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", 200))
+
+# Давраи максималии ҷустуҷӯи слотҳои озод (рӯз)
+AVAILABILITY_MAX_DAYS = int(os.getenv("AVAILABILITY_MAX_DAYS", 31))
+
+# Радиуси максималии ҷустуҷӯи беморхонаҳои наздик (км)
+NEARBY_MAX_RADIUS_KM = float(os.getenv("NEARBY_MAX_RADIUS_KM", 500))
+
+# Import-и оммавӣ: андозаи chunk (як транзаксия) ва шумораи максималии сатрҳо дар як дархост
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", 1000))
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", 50000))
+
+# Export: шумораи сатрҳое, ки аз cursor дар як партия гирифта мешаванд
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
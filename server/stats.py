@@ -0,0 +1,145 @@
+from collections import Counter
+
+from sqlalchemy import delete, event, func, inspect, insert, select
+from sqlalchemy.orm import Session
+
+from accounts.models import Appointment, Doctor, Hospital, HospitalAppointmentStats, HospitalStats
+from server.models import dialect_insert
+
+# Ҷадвалҳои hospital_stats ва hospital_appointment_stats ҳангоми flush-и Doctor ва
+# Appointment бо delta-ҳо нав мешаванд, то GET /hospitals COUNT иҷро накунад.
+# Агар рақамҳо вайрон шаванд: `python manage.py rebuild-hospital-stats`
+
+
+def _old_and_new(obj, *names):
+    # Қиматҳои пеш ва баъди тағйир барои объекти dirty
+    state = inspect(obj)
+    old, new = [], []
+    for name in names:
+        history = state.attrs[name].history
+        current = getattr(obj, name)
+        old.append(history.deleted[0] if history.deleted else current)
+        new.append(current)
+    return tuple(old), tuple(new)
+
+
+def collect_deltas(session: Session):
+    doctors = Counter()
+    appointments = Counter()
+
+    def appointment_key(values):
+        hospital_id, appointment_date, status = values
+        return hospital_id, appointment_date, status or "scheduled"
+
+    for obj in session.new:
+        if isinstance(obj, Doctor):
+            doctors[obj.hospital_id] += 1
+        elif isinstance(obj, Appointment):
+            appointments[appointment_key((obj.hospital_id, obj.appointment_date, obj.status))] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, Doctor):
+            doctors[_old_and_new(obj, "hospital_id")[0][0]] -= 1
+        elif isinstance(obj, Appointment):
+            old, _ = _old_and_new(obj, "hospital_id", "appointment_date", "status")
+            appointments[appointment_key(old)] -= 1
+
+    for obj in session.dirty:
+        if isinstance(obj, Doctor):
+            (old_hospital,), (new_hospital,) = _old_and_new(obj, "hospital_id")
+            if old_hospital != new_hospital:
+                doctors[old_hospital] -= 1
+                doctors[new_hospital] += 1
+        elif isinstance(obj, Appointment):
+            old, new = _old_and_new(obj, "hospital_id", "appointment_date", "status")
+            if old != new:
+                appointments[appointment_key(old)] -= 1
+                appointments[appointment_key(new)] += 1
+
+    return doctors, appointments
+
+
+def _upsert_increment(connection, table, key: dict, increments: dict):
+    stmt = dialect_insert(connection.dialect.name, table).values(**key, **increments)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(key),
+        set_={column: table.c[column] + stmt.excluded[column] for column in increments},
+    )
+    connection.execute(stmt)
+
+
+def apply_deltas(connection, doctors: Counter, appointments: Counter, skip_hospitals=()):
+    hospital_stats = HospitalStats.__table__
+    daily_stats = HospitalAppointmentStats.__table__
+
+    totals = Counter()
+    for (hospital_id, _, _), delta in appointments.items():
+        totals[hospital_id] += delta
+
+    for hospital_id in set(doctors) | set(totals):
+        if hospital_id is None or hospital_id in skip_hospitals:
+            continue
+        if doctors[hospital_id] or totals[hospital_id]:
+            _upsert_increment(
+                connection, hospital_stats, {"hospital_id": hospital_id},
+                {"doctor_count": doctors[hospital_id], "appointment_count": totals[hospital_id]})
+
+    for (hospital_id, appointment_date, status), delta in appointments.items():
+        if hospital_id is None or appointment_date is None or hospital_id in skip_hospitals or not delta:
+            continue
+        _upsert_increment(
+            connection, daily_stats,
+            {"hospital_id": hospital_id, "appointment_date": appointment_date, "status": status},
+            {"appointment_count": delta})
+
+
+@event.listens_for(Session, "after_flush")
+def update_hospital_stats(session: Session, flush_context):
+    deleted_hospitals = {obj.id for obj in session.deleted if isinstance(obj, Hospital)}
+    doctors, appointments = collect_deltas(session)
+    connection = session.connection()
+    if deleted_hospitals:
+        connection.execute(delete(HospitalAppointmentStats).filter(HospitalAppointmentStats.hospital_id.in_(deleted_hospitals)))
+        connection.execute(delete(HospitalStats).filter(HospitalStats.hospital_id.in_(deleted_hospitals)))
+    apply_deltas(connection, doctors, appointments, skip_hospitals=deleted_hospitals)
+
+
+def rebuild_hospital_stats(session: Session):
+    """Ҳисоби пурра аз ҷадвалҳои doctors ва appointments (барои барқарорсозӣ)."""
+    session.execute(delete(HospitalAppointmentStats))
+    session.execute(delete(HospitalStats))
+
+    doctor_counts = dict(session.execute(
+        select(Doctor.hospital_id, func.count(Doctor.id))
+        .filter(Doctor.hospital_id.is_not(None))
+        .group_by(Doctor.hospital_id)).all())
+    daily_counts = session.execute(
+        select(Appointment.hospital_id, Appointment.appointment_date,
+               func.coalesce(Appointment.status, "scheduled"), func.count(Appointment.id))
+        .group_by(Appointment.hospital_id, Appointment.appointment_date, func.coalesce(Appointment.status, "scheduled"))).all()
+
+    appointment_totals = Counter()
+    daily_rows = []
+    for hospital_id, appointment_date, status, count in daily_counts:
+        appointment_totals[hospital_id] += count
+        daily_rows.append({
+            "hospital_id": hospital_id,
+            "appointment_date": appointment_date,
+            "status": status,
+            "appointment_count": count,
+        })
+
+    stats_rows = [
+        {
+            "hospital_id": hospital_id,
+            "doctor_count": doctor_counts.get(hospital_id, 0),
+            "appointment_count": appointment_totals.get(hospital_id, 0),
+        }
+        for hospital_id in set(doctor_counts) | set(appointment_totals)
+    ]
+    if stats_rows:
+        session.execute(insert(HospitalStats), stats_rows)
+    if daily_rows:
+        session.execute(insert(HospitalAppointmentStats), daily_rows)
+    session.commit()
+    return len(stats_rows)
@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, event, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from accounts.models import (
+    Appointment, ChangeLog, Department, Doctor, DoctorSchedule, Hospital, MedicalRecord, Patient, Prescription,
+    SyncState,
+)
+from server.settings import SYNC_PAGE_SIZE, SYNC_TOMBSTONE_RETENTION_DAYS
+
+# Sync-и афзоишӣ барои клиникаҳои offline: ҳар insert/update/delete-и ORM дар
+# change_log як сатр мегузорад, GET /sync?since=<id> танҳо тағйироти баъд аз
+# cursor-ро медиҳад (сатрҳои ҷорӣ ё tombstone). Роҳҳои Core (server/bulk.py)
+# тағйиротро бо log_changes() худашон менависанд.
+#
+# Cursor id-и autoincrement аст, бинобар ин id-ҳо бояд бо тартиби commit намоён шаванд.
+# SQLite як нависанда дорад. Дар PostgreSQL транзаксияе, ки ба change_log менависад, то
+# commit advisory lock-ро нигоҳ медорад: id-и хурдтар ҳеҷ гоҳ баъд аз id-и калонтар commit
+# намешавад ва клиент тағйиротро аз даст намедиҳад. Нарх - навиштҳо дар ин қисм пайдарпаянд.
+CHANGE_LOG_LOCK_KEY = 7461287
+
+SYNC_MODELS = {
+    model.__tablename__: model
+    for model in (Hospital, Department, Doctor, DoctorSchedule, Patient, Appointment, MedicalRecord, Prescription)
+}
+
+
+def change_rows(table_name: str, row_ids, operation: str = "upsert"):
+    now = datetime.now()
+    return [{"table_name": table_name, "row_id": row_id, "operation": operation, "changed_at": now} for row_id in row_ids]
+
+
+def _serialize_writers(connection):
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": CHANGE_LOG_LOCK_KEY})
+
+
+async def log_changes(db: AsyncSession, table_name: str, row_ids, operation: str = "upsert"):
+    rows = change_rows(table_name, row_ids, operation)
+    if rows:
+        await db.run_sync(lambda session: _serialize_writers(session.connection()))
+        await db.execute(insert(ChangeLog), rows)
+
+
+def _log(connection, target, operation: str):
+    _serialize_writers(connection)
+    connection.execute(insert(ChangeLog).values(change_rows(target.__tablename__, [target.id], operation)))
+
+
+def _after_insert(mapper, connection, target):
+    _log(connection, target, "upsert")
+
+
+def _after_update(mapper, connection, target):
+    # after_update барои ҳар объекти dirty даъват мешавад, ҳатто бе тағйири сутунҳо
+    session = object_session(target)
+    if session is None or session.is_modified(target, include_collections=False):
+        _log(connection, target, "upsert")
+
+
+def _after_delete(mapper, connection, target):
+    _log(connection, target, "delete")
+
+
+for _model in SYNC_MODELS.values():
+    event.listen(_model, "after_insert", _after_insert)
+    event.listen(_model, "after_update", _after_update)
+    event.listen(_model, "after_delete", _after_delete)
+
+
+async def get_changes(db: AsyncSession, since: int, tables=None, limit: int = SYNC_PAGE_SIZE):
+    """Тағйироти баъд аз since: барои ҳар сатр ҳолати ҷорӣ (upsert) ё tombstone (delete)."""
+    sync_state = await db.get(SyncState, 1)
+    if since and sync_state is not None and since < sync_state.purged_through:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Cursor is older than the change log retention, run a full sync from since=0")
+
+    stmt = select(ChangeLog).filter(ChangeLog.id > since)
+    if tables:
+        stmt = stmt.filter(ChangeLog.table_name.in_(tables))
+    entries = (await db.scalars(stmt.order_by(ChangeLog.id).limit(limit + 1))).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Дар як саҳифа танҳо охирин тағйири ҳар сатр лозим аст
+    latest = {}
+    for entry in entries:
+        latest.pop((entry.table_name, entry.row_id), None)
+        latest[(entry.table_name, entry.row_id)] = entry
+
+    row_ids = {}
+    for (table_name, row_id), entry in latest.items():
+        if entry.operation != "delete":
+            row_ids.setdefault(table_name, []).append(row_id)
+    current = {}
+    for table_name, ids in row_ids.items():
+        table = SYNC_MODELS[table_name].__table__
+        for row in (await db.execute(select(*table.columns).filter(table.c.id.in_(ids)))).mappings():
+            current[(table_name, row["id"])] = dict(row)
+
+    changes = []
+    for key, entry in latest.items():
+        data = current.get(key)
+        changes.append({
+            "table": entry.table_name,
+            "id": entry.row_id,
+            "operation": "upsert" if data is not None else "delete",
+            "data": data,
+        })
+    return {"changes": changes, "cursor": entries[-1].id if entries else since, "has_more": has_more}
+
+
+def compact_change_log(session: Session, retention_days: int = None):
+    """Сатрҳои такрории ҳар (table, row)-ро ҳазф мекунад ва tombstone-ҳои кӯҳнаро тоза мекунад."""
+    if retention_days is None:
+        retention_days = SYNC_TOMBSTONE_RETENTION_DAYS
+    latest_ids = select(func.max(ChangeLog.id)).group_by(ChangeLog.table_name, ChangeLog.row_id)
+    superseded = session.execute(delete(ChangeLog).filter(ChangeLog.id.not_in(latest_ids))).rowcount
+
+    cutoff = datetime.now() - timedelta(days=retention_days)
+    expired = ChangeLog.operation == "delete", ChangeLog.changed_at < cutoff
+    purged_through = session.scalar(select(func.max(ChangeLog.id)).filter(*expired))
+    purged = 0
+    if purged_through is not None:
+        purged = session.execute(delete(ChangeLog).filter(*expired)).rowcount
+        sync_state = session.get(SyncState, 1) or SyncState(id=1, purged_through=0)
+        sync_state.purged_through = max(sync_state.purged_through, purged_through)
+        session.add(sync_state)
+    session.commit()
+    return superseded, purged
@@ -0,0 +1,82 @@
+from datetime import datetime
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, false, or_, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from accounts.models import Appointment, MedicalRecord
+from server.loaders import APPOINTMENT_PROFILE, MEDICAL_RECORD_PROFILE
+from server.pagination import decode_cursor, encode_cursor
+
+# Таърихи бемор: қабулҳо ва сабтҳои тиббӣ (бо рецептҳо) аз нав ба кӯҳна.
+# Ҳар навъ бо query-и алоҳида ва маҳдуди limit + 1 аз рӯи индексҳои
+# (patient_id, ...) гирифта мешавад, баъд дар Python муттаҳид мешаванд.
+# Тартиб: (at, kind, id) камшаванда; cursor ҳамин сегонаи сабти охирин аст.
+
+KIND_ORDER = {"appointment": 0, "medical_record": 1}
+
+
+def _appointment_at(appointment: Appointment) -> datetime:
+    return datetime.combine(appointment.appointment_date, appointment.appointment_time)
+
+
+def _decode_timeline_cursor(cursor: str):
+    try:
+        (at, kind), row_id = decode_cursor(cursor, MedicalRecord.id)
+        return datetime.fromisoformat(at), KIND_ORDER[kind], row_id
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def _tie_condition(kind: str, id_column, cursor_kind: int, cursor_id: int):
+    # Сабтҳои ҳамон вақт: пеш аз cursor танҳо навъи хурдтар ё ҳамон навъ бо id-и хурдтар
+    if KIND_ORDER[kind] < cursor_kind:
+        return true()
+    if KIND_ORDER[kind] == cursor_kind:
+        return id_column < cursor_id
+    return false()
+
+
+async def get_patient_timeline(db: AsyncSession, patient_id: int, limit: int, cursor: str = None):
+    appointments_stmt = select(Appointment).options(*APPOINTMENT_PROFILE).filter(Appointment.patient_id == patient_id)
+    records_stmt = select(MedicalRecord).options(*MEDICAL_RECORD_PROFILE).filter(MedicalRecord.patient_id == patient_id)
+
+    if cursor:
+        at, cursor_kind, cursor_id = _decode_timeline_cursor(cursor)
+        day, moment = at.date(), at.time()
+        appointments_stmt = appointments_stmt.filter(or_(
+            Appointment.appointment_date < day,
+            and_(Appointment.appointment_date == day, Appointment.appointment_time < moment),
+            and_(Appointment.appointment_date == day, Appointment.appointment_time == moment,
+                 _tie_condition("appointment", Appointment.id, cursor_kind, cursor_id)),
+        ))
+        records_stmt = records_stmt.filter(or_(
+            MedicalRecord.created_at < at,
+            and_(MedicalRecord.created_at == at,
+                 _tie_condition("medical_record", MedicalRecord.id, cursor_kind, cursor_id)),
+        ))
+
+    appointments = (await db.scalars(
+        appointments_stmt.order_by(
+            Appointment.appointment_date.desc(), Appointment.appointment_time.desc(), Appointment.id.desc(),
+        ).limit(limit + 1)
+    )).unique().all()
+    records = (await db.scalars(
+        records_stmt.order_by(MedicalRecord.created_at.desc(), MedicalRecord.id.desc()).limit(limit + 1)
+    )).all()
+
+    entries = [
+        {"kind": "appointment", "at": _appointment_at(appointment), "id": appointment.id, "appointment": appointment}
+        for appointment in appointments
+    ] + [
+        {"kind": "medical_record", "at": record.created_at, "id": record.id, "medical_record": record}
+        for record in records
+    ]
+    entries.sort(key=lambda entry: (entry["at"], KIND_ORDER[entry["kind"]], entry["id"]), reverse=True)
+
+    next_cursor = None
+    if len(entries) > limit:
+        entries = entries[:limit]
+        last = entries[-1]
+        next_cursor = encode_cursor([last["at"].isoformat(), last["kind"]], last["id"])
+    return {"items": entries, "next_cursor": next_cursor}
@@ -0,0 +1,66 @@
+import os
+import tempfile
+
+# Базаи муваққатии SQLite; пеш аз import-и server.settings гузошта мешавад
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp_dir}/test.db"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.pop("READ_REPLICA_URLS", None)
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from server.settings import SessionLocal, async_engine, engine
+from server.models import BaseModel
+import server.search  # DDL-и FTS5 ба metadata пайваст мешавад
+from accounts.models import PermissionGraphVersion
+
+BaseModel.metadata.create_all(engine)
+with SessionLocal() as session:
+    session.add(PermissionGraphVersion(version=1))
+    session.commit()
+
+from server.routers import app
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        client.post("/auth/register", json={"username": "tester", "password": "pw", "confirm_password": "pw"})
+        tokens = client.post("/auth/login", json={"username": "tester", "password": "pw"}).json()
+        client.headers["Authorization"] = f"Bearer {tokens['access']}"
+        yield client
+        client.portal.call(async_engine.dispose)
+
+
+@pytest.fixture
+def make_hospital(client):
+    def make(**fields):
+        data = {"name": "Test", "region": "Sughd", "city": "Khujand", "address": "a", "phone": "1", **fields}
+        return client.post("/hospitals", json=data).json()
+    return make
+
+
+@pytest.fixture
+def make_doctor(client):
+    def make(license_number, **fields):
+        data = {
+            "first_name": "Doc", "last_name": "Tor", "birth_date": "1980-01-01", "specialization": "therapist",
+            "license_number": license_number, "qualification": "q", "experience_years": 5,
+            "phone": "1", "email": "d@example.com", **fields,
+        }
+        return client.post("/doctors", json=data).json()
+    return make
+
+
+@pytest.fixture
+def make_patient(client):
+    def make(passport_number, **fields):
+        data = {
+            "first_name": "Pat", "last_name": "Ient", "birth_date": "1990-01-01", "gender": "m",
+            "passport_number": passport_number, "phone": "1", "address": "a", "region": "Sughd",
+            "emergency_contact": "c", "emergency_phone": "2", **fields,
+        }
+        return client.post("/patients", json=data).json()
+    return make
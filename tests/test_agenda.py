@@ -0,0 +1,79 @@
+import json
+import sqlite3
+from datetime import date
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from server import agenda
+from server.events import broker
+from server.replicas import replica_set
+from server.settings import create_database_engine, engine
+
+DAY = "2032-03-01"
+
+
+def book(client, doctor, patient, hospital_id, time="09:00:00"):
+    response = client.post("/appointments", json={
+        "patient_id": patient["id"], "doctor_id": doctor["id"], "hospital_id": hospital_id,
+        "appointment_date": DAY, "appointment_time": time,
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def agenda_entries(client, scope, owner_id):
+    return client.get(f"/{scope}/{owner_id}/agenda", params={"date": DAY}).json()["entries"]
+
+
+def test_cascading_deletes_refresh_agenda_and_publish(client, make_hospital, make_doctor, make_patient, monkeypatch):
+    events = []
+
+    async def publish(event):
+        events.append(event)
+
+    monkeypatch.setattr(broker, "publish", publish)
+    hospital, other = make_hospital(), make_hospital()
+    doctor = make_doctor("AGENDA-1", hospital_id=hospital["id"])
+    second = make_doctor("AGENDA-2", hospital_id=other["id"])
+    patient = make_patient("AGENDA-P")
+    appointments = [book(client, doctor, patient, hospital["id"]), book(client, second, patient, other["id"])]
+    assert len(agenda_entries(client, "doctors", second["id"])) == 1
+
+    events.clear()
+    assert client.delete(f"/patients/{patient['id']}").status_code == 200
+    assert agenda_entries(client, "doctors", second["id"]) == []
+    assert agenda_entries(client, "hospitals", other["id"]) == []
+    assert sorted(event["appointment"]["id"] for event in events) == sorted(item["id"] for item in appointments)
+    assert {event["type"] for event in events} == {"appointment.deleted"}
+
+    patient = make_patient("AGENDA-Q")
+    appointment = book(client, doctor, patient, hospital["id"])
+    assert len(agenda_entries(client, "doctors", doctor["id"])) == 1
+    events.clear()
+    assert client.delete(f"/hospitals/{hospital['id']}").status_code == 200
+    assert [event["appointment"]["id"] for event in events] == [appointment["id"]]
+    assert client.get(f"/doctors/{doctor['id']}/agenda", params={"date": DAY}).status_code == 404
+
+
+def test_agenda_miss_after_write_reads_primary(client, make_hospital, make_doctor, make_patient, monkeypatch, tmp_path):
+    hospital = make_hospital()
+    doctor = make_doctor("AGENDA-3", hospital_id=hospital["id"])
+    patient = make_patient("AGENDA-R")
+    # Replica-и ақибмонда: нусхаи база пеш аз навишт
+    replica_path = tmp_path / "replica.db"
+    with engine.connect() as connection, sqlite3.connect(replica_path) as replica:
+        connection.connection.driver_connection.backup(replica)
+    replica_engine = create_database_engine(f"sqlite+aiosqlite:///{replica_path}", is_async=True)
+    monkeypatch.setattr(replica_set, "replicas", [object()])
+
+    async def read_agenda():
+        async with AsyncSession(replica_engine) as db:
+            response = await agenda.get_day_agenda(db, "doctor", doctor["id"], date.fromisoformat(DAY))
+        return json.loads(response.body)["entries"]
+
+    try:
+        assert client.portal.call(read_agenda) == []
+        book(client, doctor, patient, hospital["id"])
+        assert len(client.portal.call(read_agenda)) == 1
+    finally:
+        client.portal.call(replica_engine.dispose)
@@ -0,0 +1,37 @@
+from datetime import date, time
+
+import pytest
+from pydantic import ValidationError
+
+from accounts.models import DoctorSchedule
+from accounts.schemas import DoctorScheduleCreateSchema
+from server.availability import expand_schedule
+from server.settings import SessionLocal
+
+MONDAY = "2033-01-03"
+
+
+@pytest.mark.parametrize("slot_duration", [0, -15])
+def test_non_positive_slot_duration_is_rejected(slot_duration):
+    with pytest.raises(ValidationError):
+        DoctorScheduleCreateSchema(doctor_id=1, day_of_week=0, start_time="09:00", end_time="12:00", slot_duration=slot_duration)
+    schedule = DoctorSchedule(doctor_id=1, day_of_week=0, start_time=time(9), end_time=time(12), slot_duration=slot_duration)
+    with pytest.raises(ValueError):
+        list(expand_schedule(schedule, date(2033, 1, 3)))
+
+
+def test_unaligned_booking_blocks_every_overlapping_slot(client, make_hospital, make_doctor, make_patient):
+    hospital = make_hospital()
+    doctor = make_doctor("AVAIL-1", hospital_id=hospital["id"])
+    patient = make_patient("AVAIL-P")
+    with SessionLocal() as session:
+        session.add(DoctorSchedule(doctor_id=doctor["id"], day_of_week=0, start_time=time(9), end_time=time(11), slot_duration=30))
+        session.commit()
+    response = client.post("/appointments", json={
+        "patient_id": patient["id"], "doctor_id": doctor["id"], "hospital_id": hospital["id"],
+        "appointment_date": MONDAY, "appointment_time": "09:10:00",
+    })
+    assert response.status_code == 200, response.text
+
+    slots = client.get(f"/doctors/{doctor['id']}/availability", params={"from": MONDAY, "to": MONDAY}).json()["slots"]
+    assert [slot["start_time"] for slot in slots] == ["10:00:00", "10:30:00"]
@@ -0,0 +1,51 @@
+import asyncio
+
+import httpx
+from sqlalchemy import func, select
+
+from accounts.models import Appointment
+from server.settings import SessionLocal
+
+PARALLEL_BOOKINGS = 300
+
+
+def test_parallel_bookings_for_one_slot(client, make_hospital, make_doctor, make_patient):
+    hospital = make_hospital()
+    doctor = make_doctor("BOOK-1", hospital_id=hospital["id"])
+    patients = [make_patient(f"BOOK-{i}") for i in range(5)]
+    slot = {"doctor_id": doctor["id"], "hospital_id": hospital["id"], "appointment_date": "2031-01-07", "appointment_time": "09:30:00"}
+
+    async def storm():
+        transport = httpx.ASGITransport(app=client.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", headers=dict(client.headers)) as http:
+            requests = [
+                http.post("/appointments", json={**slot, "patient_id": patients[i % len(patients)]["id"]})
+                for i in range(PARALLEL_BOOKINGS)
+            ]
+            return await asyncio.gather(*requests)
+
+    codes = [response.status_code for response in client.portal.call(storm)]
+    assert codes.count(200) == 1, codes
+    assert codes.count(409) == PARALLEL_BOOKINGS - 1, codes
+
+    with SessionLocal() as session:
+        active = session.scalar(select(func.count()).select_from(Appointment).filter(
+            Appointment.doctor_id == doctor["id"], Appointment.status != "cancelled"))
+    assert active == 1
+
+
+def test_cancelled_appointment_frees_the_slot(client, make_hospital, make_doctor, make_patient):
+    hospital = make_hospital()
+    doctor = make_doctor("BOOK-2", hospital_id=hospital["id"])
+    patient = make_patient("BOOK-X")
+    body = {"patient_id": patient["id"], "doctor_id": doctor["id"], "hospital_id": hospital["id"],
+            "appointment_date": "2031-01-08", "appointment_time": "10:00:00"}
+
+    first = client.post("/appointments", json=body)
+    assert first.status_code == 200
+    conflict = client.post("/appointments", json=body)
+    assert conflict.status_code == 409
+    assert conflict.json()["detail"] == "This time slot is already booked for the doctor"
+
+    assert client.patch(f"/appointments/{first.json()['id']}", json={"status": "cancelled"}).status_code == 200
+    assert client.post("/appointments", json=body).status_code == 200
@@ -0,0 +1,31 @@
+def doctor_row(license_number, hospital_id, **fields):
+    return {
+        "first_name": "Doc", "last_name": "Bulk", "birth_date": "1980-01-01", "specialization": "therapist",
+        "license_number": license_number, "qualification": "q", "experience_years": 5,
+        "phone": "1", "email": "d@example.com", "hospital_id": hospital_id, **fields,
+    }
+
+
+def doctor_count(client, hospital_id):
+    return client.get(f"/hospitals/{hospital_id}").json()["doctor_count"]
+
+
+def test_bulk_upsert_classifies_rows_and_moves_doctor_counts(client, make_hospital):
+    first, second = make_hospital(), make_hospital()
+    result = client.post("/doctors/bulk", json=[doctor_row("BULK-1", first["id"]), doctor_row("BULK-2", first["id"])]).json()
+    assert (result["created"], result["updated"]) == (2, 0), result
+    assert doctor_count(client, first["id"]) == 2
+
+    result = client.post("/doctors/bulk", json=[
+        doctor_row("BULK-1", second["id"], experience_years=9),
+        doctor_row("BULK-2", first["id"]),
+        doctor_row("BULK-3", second["id"]),
+    ]).json()
+    assert [row["status"] for row in result["results"]] == ["updated", "updated", "created"], result
+    assert (doctor_count(client, first["id"]), doctor_count(client, second["id"])) == (1, 2)
+    moved = client.get(f"/doctors/{result['results'][0]['id']}").json()
+    assert (moved["hospital_id"], moved["experience_years"], moved["version"]) == (second["id"], 9, 2)
+
+    result = client.post("/doctors/bulk", params={"on_conflict": "skip"}, json=[doctor_row("BULK-3", first["id"])]).json()
+    assert result["results"][0]["status"] == "skipped" and result["results"][0]["id"], result
+    assert (doctor_count(client, first["id"]), doctor_count(client, second["id"])) == (1, 2)
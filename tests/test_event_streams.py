@@ -0,0 +1,60 @@
+import asyncio
+
+import httpx
+
+from accounts import revocation
+from accounts.cache import token_cache
+from server.settings import async_engine
+
+# Аз pool (pool_size + max_overflow) зиёдтар, то stream-е, ки пайвастро нигоҳ медорад, pool-ро холӣ кунад
+OPEN_STREAMS = async_engine.pool.size() + async_engine.pool._max_overflow + 5
+
+
+async def open_stream(app, path: str, headers: dict, started: asyncio.Event):
+    # TestClient ва ASGITransport тамоми body-ро буфер мекунанд, бинобар ин SSE бевосита тавассути ASGI кушода мешавад
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "client": ("test", 1), "server": ("test", 80),
+    }
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Future()  # client то cancel пайваст мемонад
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            started.set()
+
+    await app(scope, receive, send)
+
+
+def test_open_event_streams_do_not_hold_pool_connections(client, monkeypatch):
+    headers = {"Authorization": client.headers["Authorization"]}
+    # Бе кэши токен ва bloom-filter ҳар auth ба база меравад (масалан баъди restart-и worker)
+    monkeypatch.setattr(token_cache, "get", lambda token: None)
+    monkeypatch.setattr(revocation, "revoked_filter", None)
+
+    async def scenario():
+        started = [asyncio.Event() for _ in range(OPEN_STREAMS)]
+        streams = [
+            asyncio.create_task(open_stream(client.app, "/appointments/events", headers, event))
+            for event in started
+        ]
+        try:
+            await asyncio.wait_for(asyncio.gather(*(event.wait() for event in started)), timeout=10)
+            transport = httpx.ASGITransport(app=client.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test", headers=headers) as http:
+                return await asyncio.wait_for(http.get("/hospitals"), timeout=5)
+        finally:
+            for stream in streams:
+                stream.cancel()
+            await asyncio.gather(*streams, return_exceptions=True)
+
+    response = client.portal.call(scenario)
+    assert response.status_code == 200, response.text
@@ -0,0 +1,118 @@
+from datetime import date, datetime, time
+
+import pytest
+from sqlalchemy import select, text
+
+from accounts.models import Appointment, Doctor, Hospital, MedicalRecord, Patient, Prescription, RevokedToken
+from server.filters import AppointmentFilters, MedicalRecordFilters, PatientFilters
+from server.pagination import PageParams, encode_cursor, keyset_statement
+from server.routers import (
+    APPOINTMENT_SORT_FIELDS, DOCTOR_SORT_FIELDS, HOSPITAL_SORT_FIELDS, MEDICAL_RECORD_SORT_FIELDS,
+    PATIENT_SORT_FIELDS, PRESCRIPTION_SORT_FIELDS,
+)
+from server.settings import engine
+
+
+def appointment_filters(**values):
+    fields = dict(patient_id=None, doctor_id=None, hospital_id=None, status=None, date_from=None, date_to=None)
+    return AppointmentFilters(**{**fields, **values})
+
+
+def query_plan(stmt) -> str:
+    sql = str(stmt.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as connection:
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+HOT_QUERIES = {
+    "doctor agenda": (
+        select(Appointment).filter(Appointment.doctor_id == 1, Appointment.appointment_date == date(2030, 1, 1))
+        .order_by(Appointment.appointment_time, Appointment.id),
+        "ix_appointments_doctor_date_time",
+    ),
+    "hospital agenda": (
+        select(Appointment).filter(Appointment.hospital_id == 1, Appointment.appointment_date == date(2030, 1, 1))
+        .order_by(Appointment.appointment_time, Appointment.id),
+        "ix_appointments_hospital_date_time",
+    ),
+    "doctor appointments in a period": (
+        appointment_filters(doctor_id=1, date_from=date(2030, 1, 1), date_to=date(2030, 1, 31)).apply(select(Appointment)),
+        "ix_appointments_doctor_date_time",
+    ),
+    "patient appointments": (
+        appointment_filters(patient_id=1).apply(select(Appointment)).order_by(Appointment.created_at.desc()),
+        "ix_appointments_patient_created",
+    ),
+    "appointments by status": (
+        appointment_filters(status="scheduled", date_from=date(2030, 1, 1)).apply(select(Appointment)),
+        "ix_appointments_status_date",
+    ),
+    "patient medical records": (
+        MedicalRecordFilters(patient_id=1, doctor_id=None).apply(select(MedicalRecord))
+        .order_by(MedicalRecord.created_at.desc()),
+        "ix_medical_records_patient_created",
+    ),
+    "prescriptions of a record": (
+        select(Prescription).filter(Prescription.medical_record_id == 1),
+        "ix_prescriptions_medical_record_id",
+    ),
+    "doctors by specialization": (
+        select(Doctor).filter(Doctor.specialization == "cardiologist"),
+        "ix_doctors_specialization",
+    ),
+    "doctors of a hospital": (
+        select(Doctor).filter(Doctor.hospital_id == 1),
+        "ix_doctors_hospital_id",
+    ),
+    "patients by region": (
+        PatientFilters(region="Sughd", gender=None, blood_type=None).apply(select(Patient)),
+        "ix_patients_region",
+    ),
+    "revoked token lookup": (
+        select(RevokedToken.id).filter(RevokedToken.jti == "abc"),
+        "sqlite_autoindex_revoked_tokens",
+    ),
+}
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_query_uses_index(name):
+    stmt, index_name = HOT_QUERIES[name]
+    plan = query_plan(stmt)
+    assert index_name in plan, plan
+    assert not any(line.startswith("SCAN") and "INDEX" not in line for line in plan.splitlines()), plan
+
+
+@pytest.mark.parametrize("name", ["doctor agenda", "hospital agenda", "patient appointments", "patient medical records"])
+def test_hot_query_is_sorted_by_index(name):
+    stmt, _ = HOT_QUERIES[name]
+    assert "TEMP B-TREE" not in query_plan(stmt)
+
+
+LIST_SORTS = [
+    (model, sort)
+    for model, fields in [
+        (Hospital, HOSPITAL_SORT_FIELDS), (Patient, PATIENT_SORT_FIELDS), (Doctor, DOCTOR_SORT_FIELDS),
+        (Appointment, APPOINTMENT_SORT_FIELDS), (MedicalRecord, MEDICAL_RECORD_SORT_FIELDS),
+        (Prescription, PRESCRIPTION_SORT_FIELDS),
+    ]
+    for field in fields
+    for sort in (field, f"-{field}")
+]
+
+CURSOR_VALUES = {int: 5, str: "M", datetime: datetime(2030, 1, 1, 12), date: date(2030, 1, 1), time: time(12)}
+
+
+@pytest.mark.parametrize("cursor", [False, True], ids=["first page", "next page"])
+@pytest.mark.parametrize("model, sort", LIST_SORTS, ids=[f"{m.__tablename__}:{s}" for m, s in LIST_SORTS])
+def test_list_sort_uses_keyset_index(model, sort, cursor):
+    field = sort.lstrip("-")
+    value = CURSOR_VALUES[getattr(model, field).type.python_type]
+    params = PageParams(limit=20, cursor=encode_cursor(value, 100) if cursor else None, sort=sort)
+    plan = query_plan(keyset_statement(select(model), model, params, [field]))
+    assert "TEMP B-TREE" not in plan, plan
+    if field != "id":
+        assert f"ix_{model.__tablename__}_{field}_id" in plan, plan
+    if cursor:
+        assert plan.startswith("SEARCH"), plan
@@ -0,0 +1,86 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from server.settings import async_engine
+
+# Саҳифа бо profile-ҳои server/loaders.py: майдонҳои ҳосилшуда бо join/subquery дар query-и асосӣ,
+# prescriptions бо як selectinload; шумора аз андозаи саҳифа вобаста нест
+EXPECTED_STATEMENTS = {
+    "/hospitals": 1,
+    "/doctors": 1,
+    "/patients": 1,
+    "/appointments": 1,
+    "/medical_records": 2,
+    "/prescriptions": 1,
+}
+
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+def seed(client, make_hospital, make_doctor, make_patient, prefix, count):
+    for i in range(count):
+        hospital = make_hospital(name=f"{prefix}-{i}")
+        doctor = make_doctor(f"{prefix}-{i}", hospital_id=hospital["id"])
+        patient = make_patient(f"{prefix}-{i}")
+        appointment = client.post("/appointments", json={
+            "patient_id": patient["id"], "doctor_id": doctor["id"], "hospital_id": hospital["id"],
+            "appointment_date": "2032-01-07", "appointment_time": f"09:{i:02d}:00",
+        }).json()
+        record = client.post("/medical_records", json={
+            "appointment_id": appointment["id"], "patient_id": patient["id"], "doctor_id": doctor["id"],
+            "diagnosis": "flu", "symptoms": "cough",
+        }).json()
+        for medicine in ("A", "B"):
+            client.post("/prescriptions", json={
+                "medical_record_id": record["id"], "medicine_name": medicine,
+                "dosage": "1", "frequency": "daily", "duration": "5d",
+            })
+
+
+def statements_per_endpoint(client):
+    counts = {}
+    for path in EXPECTED_STATEMENTS:
+        with count_statements() as statements:
+            response = client.get(path, params={"limit": 100})
+        assert response.status_code == 200, response.text
+        assert response.json()["items"], path
+        counts[path] = len(statements)
+    return counts
+
+
+def test_list_endpoints_issue_constant_statements(client, make_hospital, make_doctor, make_patient):
+    client.get("/auth/me")
+    seed(client, make_hospital, make_doctor, make_patient, "COUNT-A", 1)
+    small = statements_per_endpoint(client)
+
+    seed(client, make_hospital, make_doctor, make_patient, "COUNT-B", 10)
+    large = statements_per_endpoint(client)
+
+    assert small == EXPECTED_STATEMENTS, small
+    assert large == EXPECTED_STATEMENTS, large
+
+
+def test_derived_fields_are_populated(client, make_hospital, make_doctor, make_patient):
+    seed(client, make_hospital, make_doctor, make_patient, "DERIVED", 1)
+    doctor = next(item for item in client.get("/doctors", params={"limit": 200}).json()["items"]
+                  if item["license_number"] == "DERIVED-0")
+    assert doctor["hospital_name"] == "DERIVED-0" and doctor["age"] is not None
+    hospital = client.get(f"/hospitals/{doctor['hospital_id']}").json()
+    assert hospital["doctor_count"] == 1
+    appointment = client.get("/appointments", params={"doctor_id": doctor["id"]}).json()["items"][0]
+    assert appointment["doctor_name"] and appointment["patient_name"] and appointment["hospital_name"] == "DERIVED-0"
+    record = client.get("/medical_records", params={"doctor_id": doctor["id"]}).json()["items"][0]
+    assert sorted(prescription["medicine_name"] for prescription in record["prescriptions"]) == ["A", "B"]
@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from accounts.models import ChangeLog
+from server.settings import SessionLocal
+from server.sync import compact_change_log
+
+
+def test_write_after_compaction_is_after_the_cursor(client, make_hospital):
+    hospital = make_hospital()
+    assert client.delete(f"/hospitals/{hospital['id']}").status_code == 200
+    cursor = client.get("/sync", params={"since": 0, "limit": 1000}).json()["cursor"]
+    while (page := client.get("/sync", params={"since": cursor, "limit": 1000}).json())["changes"]:
+        cursor = page["cursor"]
+
+    # Tombstone-и охирин (id == cursor) кӯҳна мешавад ва compact онро ҳазф мекунад
+    with SessionLocal() as session:
+        session.execute(update(ChangeLog).filter(ChangeLog.id == cursor).values(changed_at=datetime.now() - timedelta(days=365)))
+        session.commit()
+        compact_change_log(session, retention_days=30)
+        assert session.get(ChangeLog, cursor) is None
+
+    created = make_hospital()
+    page = client.get("/sync", params={"since": cursor}).json()
+    assert [(change["table"], change["id"]) for change in page["changes"]] == [("hospitals", created["id"])]
+    assert page["cursor"] > cursor